@@ -0,0 +1,93 @@
+# Выделение памяти и скорость шага обучения: прежний цикл nntask5 (новые массивы
+# на каждом образце) и BackpropWorkspace (буферы выделены заранее).
+# Память на шаге измеряется tracemalloc как прирост пикового объёма за шаг.
+# Запуск: python benchmarks/bench_backprop_workspace.py [--layers 64 128 10] [--steps 2000] [--batch-size 1]
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.backprop import BackpropWorkspace
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def sigmoid_derivative(x):
+    return x * (1 - x)
+
+
+# Шаг прежнего train_network: списки и временные массивы создаются заново
+def reference_step(network, x, y):
+    activations = [x]
+    for layer in network:
+        activations.append(sigmoid(activations[-1] @ layer))
+    error = y - activations[-1]
+    total_error = np.sum(error ** 2)
+    deltas = [error * sigmoid_derivative(activations[-1])]
+    for i in range(len(network) - 1, 0, -1):
+        deltas.append((deltas[-1] @ network[i].T) * sigmoid_derivative(activations[i]))
+    deltas.reverse()
+    for i in range(len(network)):
+        network[i] += activations[i].T @ deltas[i]
+    return total_error
+
+
+def make_workspace_step(network, batch_size):
+    workspace = BackpropWorkspace(network, batch_size)
+
+    def step(network, x, y):
+        total_error = workspace.compute_gradients(network, x, y)
+        for layer, gradient in zip(network, workspace.gradients):
+            layer += gradient
+        return total_error
+    return step
+
+
+# Наибольший прирост памяти за шаг (байт) после прогрева
+def peak_per_step(step, network, batches):
+    step(network, *batches[0])
+    tracemalloc.start()
+    worst = 0
+    for x, y in batches:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step(network, x, y)
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return worst
+
+
+def steps_per_second(step, network, batches):
+    start = time.perf_counter()
+    for x, y in batches:
+        step(network, x, y)
+    return len(batches) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Память и скорость шага обучения.")
+    parser.add_argument('--layers', type=int, nargs='+', default=[64, 128, 10], help='Размеры слоёв (по умолчанию: 64 128 10)')
+    parser.add_argument('--steps', type=int, default=2000, help='Число шагов (по умолчанию: 2000)')
+    parser.add_argument('--batch-size', type=int, default=1, help='Образцов в шаге (по умолчанию: 1)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sizes = args.layers
+    initial = [rng.uniform(-0.1, 0.1, (sizes[k], sizes[k + 1])) for k in range(len(sizes) - 1)]
+    batches = [(rng.random((args.batch_size, sizes[0])), rng.random((args.batch_size, sizes[-1])))
+               for _ in range(args.steps)]
+
+    print(f"{'':>12} {'байт/шаг':>10} {'шагов/с':>10}")
+    for name in ("прежний", "буферы"):
+        network = [layer.copy() for layer in initial]
+        step = reference_step if name == "прежний" else make_workspace_step(network, args.batch_size)
+        peak = peak_per_step(step, network, batches[:200])
+        rate = steps_per_second(step, network, batches)
+        print(f"{name:>12} {peak:>10} {rate:>10.0f}")
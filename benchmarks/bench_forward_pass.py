@@ -0,0 +1,56 @@
+# Пропускная способность прямого распространения (векторов в секунду):
+# поэлементный расчёт на Python и матричный Network в float64 и float32.
+# Запуск: python benchmarks/bench_forward_pass.py [--layers 784 256 128 10] [--batch 10000]
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.network import Network
+
+
+# Прежняя реализация nntask4: каждый нейрон - генератор sum и math.exp
+def forward_pass_python(weights, input_vector, c=1):
+    activations = input_vector
+    for layer in weights:
+        activations = [1.0 / (1.0 + math.exp(-c * sum(w * a for w, a in zip(neuron, activations))))
+                       for neuron in layer]
+    return activations
+
+
+def random_layers(sizes, rng):
+    return [rng.uniform(-0.1, 0.1, (sizes[k + 1], sizes[k])) for k in range(len(sizes) - 1)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер скорости прямого распространения.")
+    parser.add_argument('--layers', type=int, nargs='+', default=[784, 256, 128, 10], help='Размеры слоёв (по умолчанию: 784 256 128 10)')
+    parser.add_argument('--batch', type=int, default=10000, help='Число векторов в пакете (по умолчанию: 10000)')
+    parser.add_argument('--python-vectors', type=int, default=20, help='Число векторов для расчёта на Python (по умолчанию: 20)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    layers = random_layers(args.layers, rng)
+    inputs = rng.uniform(0, 1, (args.batch, args.layers[0]))
+
+    weights = [layer.tolist() for layer in layers]
+    vectors = inputs[:args.python_vectors].tolist()
+    start = time.perf_counter()
+    expected = [forward_pass_python(weights, vector) for vector in vectors]
+    python_rate = len(vectors) / (time.perf_counter() - start)
+    print(f"{'Python':>10} {python_rate:>14.0f} векторов/с")
+
+    for dtype in (np.float64, np.float32):
+        network = Network(layers, dtype=dtype)
+        network.forward(inputs[:10])
+        start = time.perf_counter()
+        outputs = network.forward(inputs)
+        rate = len(inputs) / (time.perf_counter() - start)
+        deviation = np.max(np.abs(outputs[:len(expected)] - np.array(expected)))
+        print(f"{np.dtype(dtype).name:>10} {rate:>14.0f} векторов/с, x{rate / python_rate:.0f}, "
+              f"отклонение {deviation:.1e}")
@@ -0,0 +1,59 @@
+# Сравнение времени загрузки графа из текстового файла и из XML файла nntask1.
+# Запуск: python benchmarks/bench_graph_load.py [--min-exp 3] [--max-exp 6] [--memory]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_graph_parser import generate_graph_file
+from nnlib.graph_parser import read_graph_file
+from nnlib.xml_io import read_graph_xml_file, write_graph_xml
+
+
+# Время загрузки и пиковый объём памяти (при measure_memory)
+def measure(load, file_path, measure_memory):
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    load(file_path)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сравнение загрузки графа из текста и из XML.")
+    parser.add_argument('--min-exp', type=int, default=3, help='Минимальная степень 10 числа дуг (по умолчанию: 3)')
+    parser.add_argument('--max-exp', type=int, default=6, help='Максимальная степень 10 числа дуг (по умолчанию: 6)')
+    parser.add_argument('--memory', action='store_true', help='Замерять пиковый объём памяти (медленнее)')
+    args = parser.parse_args()
+
+    header = f"{'дуг':>10} {'текст, с':>10} {'XML, с':>10} {'XML/текст':>10}"
+    if args.memory:
+        header += f" {'текст, МБ':>10} {'XML, МБ':>10}"
+    print(header)
+    with tempfile.TemporaryDirectory() as tmp:
+        for exp in range(args.min_exp, args.max_exp + 1):
+            arcs_count = 10 ** exp
+            text_path = os.path.join(tmp, f"graph_{exp}.txt")
+            xml_path = os.path.join(tmp, f"graph_{exp}.xml")
+            generate_graph_file(text_path, arcs_count)
+            with open(xml_path, "w", encoding="UTF-8") as f:
+                write_graph_xml(read_graph_file(text_path), f)
+
+            text_time, text_peak = measure(read_graph_file, text_path, args.memory)
+            xml_time, xml_peak = measure(read_graph_xml_file, xml_path, args.memory)
+
+            line = f"{arcs_count:>10} {text_time:>10.3f} {xml_time:>10.3f} {xml_time / text_time:>10.2f}"
+            if args.memory:
+                line += f" {text_peak / 2 ** 20:>10.1f} {xml_peak / 2 ** 20:>10.1f}"
+            print(line)
+            os.remove(text_path)
+            os.remove(xml_path)
@@ -0,0 +1,60 @@
+# Замер времени потокового чтения графа: от 10^3 до 10^7 дуг.
+# Запуск: python benchmarks/bench_graph_parser.py [--min-exp 3] [--max-exp 7] [--memory]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.graph_parser import read_graph_file
+
+
+# Генерация ациклического графа: у каждой вершины не более двух входящих дуг
+def generate_graph_file(file_path, arcs_count, batch=100000):
+    with open(file_path, "w", encoding="UTF-8") as f:
+        for start in range(0, arcs_count, batch):
+            parts = []
+            for k in range(start, min(start + batch, arcs_count)):
+                dst = k // 2 + 1
+                order = k % 2 + 1
+                src = dst - 1 if order == 1 else dst // 2
+                parts.append(f"(v{src}, v{dst}, {order})")
+            if start:
+                f.write(", ")
+            f.write(", ".join(parts))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени чтения графа.")
+    parser.add_argument('--min-exp', type=int, default=3, help='Минимальная степень 10 числа дуг (по умолчанию: 3)')
+    parser.add_argument('--max-exp', type=int, default=7, help='Максимальная степень 10 числа дуг (по умолчанию: 7)')
+    parser.add_argument('--memory', action='store_true', help='Замерять пиковый и итоговый объём памяти (медленнее)')
+    args = parser.parse_args()
+
+    header = f"{'дуг':>10} {'время, с':>10} {'мкс/дугу':>10}"
+    if args.memory:
+        header += f" {'пик, МБ':>10} {'граф, МБ':>10} {'байт/дугу':>10}"
+    print(header)
+    with tempfile.TemporaryDirectory() as tmp:
+        for exp in range(args.min_exp, args.max_exp + 1):
+            arcs_count = 10 ** exp
+            file_path = os.path.join(tmp, f"graph_{exp}.txt")
+            generate_graph_file(file_path, arcs_count)
+
+            if args.memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            graph = read_graph_file(file_path)
+            elapsed = time.perf_counter() - start
+
+            line = f"{arcs_count:>10} {elapsed:>10.3f} {elapsed / arcs_count * 1e6:>10.3f}"
+            if args.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                line += f" {peak / 2 ** 20:>10.1f} {current / 2 ** 20:>10.1f} {current / arcs_count:>10.1f}"
+            print(line)
+            del graph
+            os.remove(file_path)
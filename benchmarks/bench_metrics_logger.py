@@ -0,0 +1,53 @@
+# Запись истории обучения: список строк с записью в конце (как было в nntask5)
+# против журнала метрик с кольцевым буфером и фоновым потоком.
+# Замеряются время на запись и, отдельным запуском, пиковая память (tracemalloc).
+# Запуск: python benchmarks/bench_metrics_logger.py [--records 1000000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.metrics import MetricsLogger
+
+
+def write_joined(path, records):
+    history = []
+    for iteration in range(1, records + 1):
+        history.append(f"{iteration} : {iteration * 0.5}")
+    with open(path, "w") as file:
+        file.write("\n".join(history))
+
+
+def write_logged(path, records):
+    columns = ["iteration", "error", "time", "grad_norm_0", "grad_norm_1"]
+    with MetricsLogger(path, columns, "{iteration} : {error}") as logger:
+        for iteration in range(1, records + 1):
+            logger.log(iteration, iteration * 0.5, 0.0, 1.0, 1.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер записи истории обучения.")
+    parser.add_argument('--records', type=int, default=1000000, help='Число записей (по умолчанию: 1000000)')
+    args = parser.parse_args()
+
+    print(f"{'способ':>22} {'мкс/запись':>11} {'пик памяти, МБ':>15} {'файл, МБ':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [("список + join (.txt)", write_joined, "joined.txt"),
+                 ("журнал (.txt)", write_logged, "logged.txt"),
+                 ("журнал (.csv)", write_logged, "logged.csv"),
+                 ("журнал (.bin)", write_logged, "logged.bin")]
+        for name, write, file_name in cases:
+            path = os.path.join(tmp, file_name)
+            start = time.perf_counter()
+            write(path, args.records)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            write(path, args.records)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>22} {elapsed / args.records * 1e6:>11.2f} {peak / 2 ** 20:>15.1f} "
+                  f"{os.path.getsize(path) / 2 ** 20:>9.1f}")
@@ -0,0 +1,81 @@
+# Время обучения до заданной ошибки: пошаговые методы referat/task1.py
+# (обновление после каждого образца) против полнопакетных сопряжённых
+# градиентов и L-BFGS. Выборка порождается случайной сетью-учителем той же
+# архитектуры, поэтому ошибка может быть сколь угодно малой.
+# Запуск: python benchmarks/bench_time_to_target.py [--samples 1000] [--layers 8 16 4] [--target 1e-4]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.backprop import BackpropWorkspace
+from nnlib.full_batch import FULL_BATCH_METHODS, make_full_batch_method
+from nnlib.optimizers import OPTIMIZERS, make_optimizer
+
+# Скорости обучения пошаговых методов, при которых они сходятся на этой задаче
+LEARNING_RATES = {
+    "SGD": 0.5, "Momentum": 0.1, "QuickProp": 0.01, "RProp": 0.1, "ConjugateGradient": 0.1,
+    "NAG": 0.1, "AdaGrad": 0.1, "AdaDelta": 1.0, "Adam": 0.01,
+}
+
+
+# Эпохи пошагового метода до ошибки target или истечения time_limit.
+# Возвращает число эпох, время и последнюю ошибку эпохи
+def run_stepwise(method, network, inputs, targets, target, time_limit):
+    optimizer = make_optimizer(method, LEARNING_RATES[method])
+    workspace = BackpropWorkspace(network)
+    start = time.perf_counter()
+    epochs = 0
+    while True:
+        total_error = 0.0
+        for k in range(len(inputs)):
+            total_error += workspace.compute_gradients(network, inputs[k:k + 1], targets[k:k + 1])
+            optimizer.step(network, workspace.gradients)
+        epochs += 1
+        elapsed = time.perf_counter() - start
+        if total_error <= target or elapsed >= time_limit:
+            return epochs, elapsed, total_error
+
+
+def run_full_batch(method, network, inputs, targets, target, time_limit):
+    start = time.perf_counter()
+    full_batch_method = make_full_batch_method(method, network, inputs, targets)
+    epochs = 0
+    while True:
+        epochs += 1
+        total_error = full_batch_method.step()
+        elapsed = time.perf_counter() - start
+        if total_error <= target or elapsed >= time_limit:
+            return epochs, elapsed, total_error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени обучения до заданной ошибки.")
+    parser.add_argument('--samples', type=int, default=1000, help='Число образцов (по умолчанию: 1000)')
+    parser.add_argument('--layers', type=int, nargs='+', default=[8, 16, 4], help='Размеры слоёв (по умолчанию: 8 16 4)')
+    parser.add_argument('--target', type=float, default=1e-4,
+                        help='Целевая средняя квадратичная ошибка на выход образца (по умолчанию: 1e-4)')
+    parser.add_argument('--time-limit', type=float, default=20.0, help='Ограничение времени на метод, с (по умолчанию: 20)')
+    parser.add_argument('--methods', nargs='+', default=list(OPTIMIZERS) + list(FULL_BATCH_METHODS), help='Методы')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sizes = args.layers
+    teacher = [rng.normal(0, 2, (sizes[k], sizes[k + 1])) for k in range(len(sizes) - 1)]
+    initial = [rng.uniform(-0.5, 0.5, (sizes[k], sizes[k + 1])) for k in range(len(sizes) - 1)]
+    inputs = rng.random((args.samples, sizes[0]))
+    targets = BackpropWorkspace(teacher, args.samples).forward(teacher, inputs).copy()
+    # Ошибка обучения - сумма квадратов по выборке
+    target = args.target * targets.size
+
+    print(f"Цель: сумма квадратов ошибки <= {target:g}")
+    print(f"{'метод':>18} {'эпох':>8} {'время, с':>10} {'ошибка':>12} {'достигнута':>11}")
+    for method in args.methods:
+        network = [layer.copy() for layer in initial]
+        run = run_full_batch if method in FULL_BATCH_METHODS else run_stepwise
+        epochs, elapsed, error = run(method, network, inputs, targets, target, args.time_limit)
+        print(f"{method:>18} {epochs:>8} {elapsed:>10.3f} {error:>12.5g} {'да' if error <= target else 'нет':>11}")
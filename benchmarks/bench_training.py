@@ -0,0 +1,39 @@
+# Время эпохи обучения nntask5 в зависимости от размера мини-пакета.
+# Запуск: python benchmarks/bench_training.py [--samples 20000] [--layers 64 128 10] [--batch-sizes 1 8 32 128 512]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nntask5.nntask5 import train_network
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени эпохи обучения.")
+    parser.add_argument('--samples', type=int, default=20000, help='Число образцов (по умолчанию: 20000)')
+    parser.add_argument('--layers', type=int, nargs='+', default=[64, 128, 10], help='Размеры слоёв (по умолчанию: 64 128 10)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 128, 512], help='Размеры мини-пакетов')
+    parser.add_argument('--epochs', type=int, default=1, help='Число эпох на замер (по умолчанию: 1)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sizes = args.layers
+    initial = [rng.uniform(-0.1, 0.1, (sizes[k], sizes[k + 1])) for k in range(len(sizes) - 1)]
+    training_data = list(zip(rng.random((args.samples, sizes[0])), rng.random((args.samples, sizes[-1]))))
+
+    print(f"{'пакет':>8} {'эпоха, с':>10} {'образцов/с':>12} {'ускорение':>10}")
+    base = None
+    with tempfile.TemporaryDirectory() as tmp:
+        history = os.path.join(tmp, "history.txt")
+        for batch_size in args.batch_sizes:
+            network = [layer.copy() for layer in initial]
+            start = time.perf_counter()
+            train_network(network, training_data, args.epochs, history, batch_size)
+            epoch = (time.perf_counter() - start) / args.epochs
+            base = base or epoch
+            print(f"{batch_size:>8} {epoch:>10.3f} {args.samples / epoch:>12.0f} {base / epoch:>10.1f}")
@@ -0,0 +1 @@
+# Общий код лабораторных работ по нейронным сетям
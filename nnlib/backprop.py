@@ -0,0 +1,67 @@
+# Обратное распространение ошибки для полносвязной сети с сигмоидой
+# (слои - матрицы (входы, выходы), как в nntask5) без выделения памяти на шаге:
+# активации, дельты и градиенты лежат в буферах, выделенных один раз,
+# все операции выполняются на месте через out=
+import numpy as np
+
+
+class BackpropWorkspace:
+    # network - матрицы слоёв; batch_size - наибольшее число образцов в пакете
+    def __init__(self, network, batch_size=1):
+        sizes = [layer.shape[1] for layer in network]
+        self.batch_size = batch_size
+        self.activations = [np.empty((batch_size, size)) for size in sizes]
+        self.deltas = [np.empty((batch_size, size)) for size in sizes]
+        self.derivatives = [np.empty((batch_size, size)) for size in sizes]
+        # Градиенты со знаком направления обновления: веса += градиент
+        self.gradients = [np.empty(layer.shape) for layer in network]
+        # Представления буферов для пакетов из n образцов, по n
+        self.views = {}
+
+    # Срезы активаций, дельт и производных на первые n строк
+    def views_for(self, n):
+        views = self.views.get(n)
+        if views is None:
+            views = self.views[n] = ([buffer[:n] for buffer in self.activations],
+                                     [buffer[:n] for buffer in self.deltas],
+                                     [buffer[:n] for buffer in self.derivatives])
+        return views
+
+    # Прямое распространение пакета x (образец - строка). Возвращает выход сети
+    def forward(self, network, x):
+        inputs = x
+        for layer, out in zip(network, self.views_for(len(x))[0]):
+            np.matmul(inputs, layer, out=out)
+            # Сигмоида на месте: 1 / (1 + exp(-z))
+            np.negative(out, out=out)
+            np.exp(out, out=out)
+            np.add(out, 1, out=out)
+            np.reciprocal(out, out=out)
+            inputs = out
+        return inputs
+
+    # Прямой и обратный проход для пакета (x, y): градиенты (сумма по пакету)
+    # записываются в self.gradients. Возвращает сумму квадратов ошибки
+    def compute_gradients(self, network, x, y):
+        activations, deltas, derivatives = self.views_for(len(x))
+        output = self.forward(network, x)
+        last = len(network) - 1
+
+        # Ошибка выходного слоя и её вклад в суммарную ошибку
+        np.subtract(y, output, out=deltas[last])
+        np.square(deltas[last], out=derivatives[last])
+        total_error = np.sum(derivatives[last])
+
+        # Дельта слоя: ошибка, умноженная на производную сигмоиды a * (1 - a)
+        for i in range(last, -1, -1):
+            derivative = derivatives[i]
+            np.subtract(1, activations[i], out=derivative)
+            np.multiply(activations[i], derivative, out=derivative)
+            np.multiply(deltas[i], derivative, out=deltas[i])
+            if i > 0:
+                np.matmul(deltas[i], network[i].T, out=deltas[i - 1])
+
+        for i in range(len(network)):
+            inputs = x if i == 0 else activations[i - 1]
+            np.matmul(inputs.T, deltas[i], out=self.gradients[i])
+        return total_error
@@ -0,0 +1,63 @@
+# Параллельная обработка множества входных файлов. Каждый файл обрабатывается
+# в отдельном процессе, его вывод на консоль и сообщения об ошибках собираются
+# и записываются одним процессом в порядке файлов
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+ERRORS_FILE = "errors.txt"
+
+# Сообщения об ошибках текущего файла при параллельной обработке (None - запись сразу в файл)
+_error_buffer = None
+
+
+# Запись сообщения об ошибке в errors.txt
+def log_error(message):
+    if _error_buffer is not None:
+        _error_buffer.append(message)
+        return
+    with open(ERRORS_FILE, "a", encoding="UTF-8") as f:
+        f.write(message + '\n')
+
+
+# Обработка одного файла в процессе пула: возвращает вывод и ошибки
+def _run_captured(task):
+    global _error_buffer
+    func, args = task
+    _error_buffer = []
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            func(*args)
+    finally:
+        errors, _error_buffer = _error_buffer, None
+    return output.getvalue(), errors
+
+
+# Вызов func(*args) для каждого набора аргументов из tasks.
+# При jobs > 1 файлы обрабатываются пулом процессов, а вывод и errors.txt
+# пишутся только здесь, в исходном порядке файлов. initializer(*initargs)
+# выполняется в каждом процессе пула до обработки файлов: процессы, запущенные
+# методами spawn и forkserver, не наследуют состояние исходного процесса
+def run_files(func, tasks, jobs=1, initializer=None, initargs=()):
+    if jobs <= 1:
+        for args in tasks:
+            func(*args)
+        return
+
+    tasks = [(func, args) for args in tasks]
+    # Мелкие файлы передаются процессам группами, чтобы снизить накладные расходы
+    chunksize = max(1, len(tasks) // (jobs * 8))
+    err_file = None
+    try:
+        with ProcessPoolExecutor(jobs, initializer=initializer, initargs=initargs) as pool:
+            for output, errors in pool.map(_run_captured, tasks, chunksize=chunksize):
+                sys.stdout.write(output)
+                if errors and err_file is None:
+                    err_file = open(ERRORS_FILE, "a", encoding="UTF-8")
+                for message in errors:
+                    err_file.write(message + '\n')
+    finally:
+        if err_file is not None:
+            err_file.close()
@@ -0,0 +1,100 @@
+# Контрольные точки обучения nntask5: веса сети, состояние метода обучения,
+# число пройденных эпох и состояние критериев остановки в одном двоичном файле.
+# Заголовок: сигнатура, версия, длина описания и число массивов; описание в JSON
+# (номер эпохи, метод, счётчики, формы массивов); затем массивы float64 подряд,
+# каждый выровнен по 64 байтам. Файл записывается во временный с уникальным
+# именем и атомарно заменяет предыдущую точку, поэтому прерванная запись её
+# не портит, а одновременные записи не мешают друг другу
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"NNCK"
+VERSION = 2
+# Сигнатура, версия, длина описания, число массивов
+HEADER = struct.Struct("<4sIQQ")
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# Содержимое контрольной точки. iteration - число завершённых эпох,
+# elapsed - время обучения до контрольной точки в секундах
+class Checkpoint:
+    def __init__(self, network, method, learning_rate, optimizer_state, counters, iteration, elapsed=0.0,
+                 stopping_state=None):
+        self.network = network
+        self.method = method
+        self.learning_rate = learning_rate
+        self.optimizer_state = optimizer_state
+        self.counters = counters
+        self.iteration = iteration
+        self.elapsed = elapsed
+        self.stopping_state = stopping_state or {}
+
+
+# Сохранение сети и состояния обучения. optimizer - объект nnlib.optimizers
+def save_checkpoint(file_path, network, optimizer, iteration, elapsed=0.0, stopping_state=None):
+    arrays = [np.asarray(layer, dtype=np.float64) for layer in network]
+    state = optimizer.state_arrays()
+    arrays += state
+    description = json.dumps({
+        "iteration": iteration,
+        "elapsed": elapsed,
+        "method": type(optimizer).__name__,
+        "learning_rate": optimizer.learning_rate,
+        "counters": optimizer.counter_values(),
+        "layers": len(network),
+        "state": len(state),
+        "shapes": [list(array.shape) for array in arrays],
+        "stopping": stopping_state or {},
+    }).encode("UTF-8")
+
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(file_path) or ".", prefix=os.path.basename(file_path) + ".",
+                                    suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(description), len(arrays)))
+            f.write(description)
+            for array in arrays:
+                f.write(bytes(_aligned(f.tell()) - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f.name, file_path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+# Чтение контрольной точки. Массивы копируются из файла и изменяемы
+def load_checkpoint(file_path):
+    with open(file_path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError("Файл контрольной точки повреждён: неполный заголовок")
+    magic, version, length, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Неизвестный формат файла контрольной точки")
+    offset = HEADER.size + length
+    description = json.loads(data[HEADER.size:offset].decode("UTF-8"))
+
+    arrays = []
+    for shape in description["shapes"][:count]:
+        offset = _aligned(offset)
+        size = int(np.prod(shape, dtype=np.int64))
+        if offset + 8 * size > len(data):
+            raise ValueError("Файл контрольной точки повреждён: неполные данные")
+        arrays.append(np.frombuffer(data, dtype=np.float64, count=size, offset=offset).reshape(shape).copy())
+        offset += 8 * size
+
+    layers = description["layers"]
+    state = description["state"]
+    return Checkpoint(arrays[:layers], description["method"], description["learning_rate"],
+                      arrays[layers:layers + state], description["counters"],
+                      description["iteration"], description["elapsed"], description["stopping"])
@@ -0,0 +1,135 @@
+# Потоковое чтение и запись столбцов значений для пакетных вычислений.
+# Входной файл: CSV с заголовком из имён вершин, NPY со структурированным
+# массивом (поля - имена вершин) или NPZ с отдельным массивом на вершину.
+# NPY отображается в память, члены NPZ распаковываются потоком
+import zipfile
+from itertools import islice, zip_longest
+
+import numpy as np
+
+# Число строк, обрабатываемых за один раз
+CHUNK_SIZE = 65536
+
+
+# Разбор порции строк CSV в матрицу чисел. Число значений проверяется
+# в каждой строке, иначе короткая и длинная строки компенсировали бы друг друга.
+# message - текст ошибки при несовпадении длины строки
+def parse_csv_rows(lines, width, message=None):
+    message = message or f"В каждой строке должно быть {width} чисел через запятую"
+    for line in lines:
+        if line.count(",") + 1 != width:
+            raise ValueError(message)
+    text = ",".join(line.strip() for line in lines)
+    try:
+        block = np.fromstring(text, dtype=np.float64, sep=",")
+    except ValueError:
+        block = None
+    if block is None or block.size != len(lines) * width:
+        raise ValueError(message)
+    return block.reshape(len(lines), width)
+
+
+def iter_csv_columns(file_path, chunk_size):
+    with open(file_path, "r", encoding="UTF-8") as f:
+        header = [name.strip() for name in f.readline().split(",")]
+        while True:
+            lines = [line for line in islice(f, chunk_size) if line.strip()]
+            if not lines:
+                break
+            block = parse_csv_rows(lines, len(header))
+            yield {name: block[:, k] for k, name in enumerate(header)}
+
+
+def iter_npy_columns(file_path, chunk_size):
+    data = np.load(file_path, mmap_mode="r")
+    if data.dtype.names is None:
+        raise ValueError("NPY файл должен содержать структурированный массив с именами вершин")
+    for start in range(0, len(data), chunk_size):
+        block = data[start:start + chunk_size]
+        yield {name: np.asarray(block[name], dtype=np.float64) for name in data.dtype.names}
+
+
+# Массив name архива NPZ порциями по chunk_size строк. Член архива читается
+# потоком (в том числе сжатый savez_compressed) и в памяти целиком не хранится;
+# только массив в порядке Fortran приходится прочитать целиком
+def iter_npz_member(archive, name, chunk_size):
+    with archive.open(name + ".npy") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if dtype.hasobject or not shape:
+            raise ValueError(f"Массив {name} NPZ файла должен быть числовым и иметь строки")
+        if fortran_order and len(shape) > 1:
+            data = np.frombuffer(f.read(), dtype=dtype).reshape(shape, order="F")
+            for start in range(0, shape[0], chunk_size):
+                yield data[start:start + chunk_size]
+            return
+        row_size = dtype.itemsize * int(np.prod(shape[1:]))
+        for start in range(0, shape[0], chunk_size):
+            count = min(chunk_size, shape[0] - start)
+            buffer = f.read(count * row_size)
+            if len(buffer) != count * row_size:
+                raise ValueError(f"Массив {name} NPZ файла обрезан")
+            yield np.frombuffer(buffer, dtype=dtype).reshape((count,) + shape[1:])
+
+
+# Одновременные порции массивов names архива NPZ (None - все массивы).
+# Возвращает имена массивов и генератор кортежей порций
+def iter_npz_arrays(file_path, names=None, chunk_size=CHUNK_SIZE):
+    archive = zipfile.ZipFile(file_path)
+    if names is None:
+        names = [member[:-4] for member in archive.namelist() if member.endswith(".npy")]
+
+    def blocks():
+        with archive:
+            readers = [iter_npz_member(archive, name, chunk_size) for name in names]
+            for block in zip_longest(*readers):
+                if any(part is None or len(part) != len(block[0]) for part in block):
+                    raise ValueError("Массивы NPZ файла должны быть одной длины")
+                yield block
+
+    return names, blocks()
+
+
+def iter_npz_columns(file_path, chunk_size):
+    names, blocks = iter_npz_arrays(file_path, chunk_size=chunk_size)
+    for block in blocks:
+        yield {name: np.asarray(column, dtype=np.float64) for name, column in zip(names, block)}
+
+
+# Порции входных значений: словари имя вершины -> столбец значений
+def iter_columns(file_path, chunk_size=CHUNK_SIZE):
+    if file_path.endswith(".npy"):
+        return iter_npy_columns(file_path, chunk_size)
+    if file_path.endswith(".npz"):
+        return iter_npz_columns(file_path, chunk_size)
+    return iter_csv_columns(file_path, chunk_size)
+
+
+# Потоковая запись результатов: заголовок из имён столбцов, затем строки порциями
+class ColumnWriter:
+    def __init__(self, file_path, names):
+        self.file = open(file_path, "w", encoding="UTF-8")
+        self.file.write(",".join(names) + "\n")
+        self.width = len(names)
+        self.rows = 0
+
+    def write(self, columns, size):
+        self.rows += size
+        if not self.width:
+            return
+        block = np.empty((size, self.width))
+        for k, column in enumerate(columns):
+            block[:, k] = column
+        np.savetxt(self.file, block, fmt="%.17g", delimiter=",")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
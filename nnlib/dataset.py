@@ -0,0 +1,116 @@
+# Потоковая обучающая выборка для данных больше оперативной памяти.
+# Файл читается порциями, порции перемешиваются в буфере ограниченного размера
+# и выдаются мини-пакетами; следующий пакет готовится фоновым потоком,
+# пока обучается текущий
+import queue
+import threading
+
+import numpy as np
+
+from .column_io import CHUNK_SIZE, iter_npz_arrays
+from .pipeline import get_until_stopped, put_until_stopped
+from .training_io import iter_csv_samples, iter_text_samples
+
+# Число строк в буфере перемешивания и число заранее подготовленных пакетов
+SHUFFLE_BUFFER = 1 << 16
+PREFETCH = 2
+
+
+class TrainingStream:
+    # file_path - выборка в любом формате load_samples. NPY отображается в память,
+    # его порции читаются в случайном порядке; NPZ, текст и CSV читаются последовательно.
+    # shuffle=False - пакеты в порядке файла. seed - начальное состояние генератора
+    def __init__(self, file_path, buffer_size=SHUFFLE_BUFFER, shuffle=True, seed=None,
+                 prefetch=PREFETCH, chunk_size=CHUNK_SIZE):
+        self.file_path = file_path
+        self.buffer_size = buffer_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.prefetch = prefetch
+        # Порция чтения не больше буфера, иначе буфер не ограничивает память
+        self.chunk_size = min(chunk_size, buffer_size)
+
+    # Порции выборки (входы, выходы) в памяти
+    def iter_blocks(self):
+        if self.file_path.endswith(".npy"):
+            data = np.load(self.file_path, mmap_mode="r")
+            if data.dtype.names is None or "x" not in data.dtype.names or "y" not in data.dtype.names:
+                raise ValueError("NPY файл выборки должен содержать структурированный массив с полями x и y")
+            inputs, targets = data["x"], data["y"]
+            starts = np.arange(0, len(inputs), self.chunk_size)
+            if self.shuffle:
+                self.rng.shuffle(starts)
+            for start in starts:
+                end = start + self.chunk_size
+                yield np.array(inputs[start:end], dtype=float), np.array(targets[start:end], dtype=float)
+        elif self.file_path.endswith(".npz"):
+            _, blocks = iter_npz_arrays(self.file_path, ("x", "y"), self.chunk_size)
+            for inputs, targets in blocks:
+                yield np.array(inputs, dtype=float), np.array(targets, dtype=float)
+        elif self.file_path.endswith(".csv"):
+            yield from iter_csv_samples(self.file_path, self.chunk_size)
+        else:
+            yield from iter_text_samples(self.file_path, self.chunk_size)
+
+    # Мини-пакеты одной эпохи без фонового потока. Буфер перемешивания
+    # заполняется порциями до buffer_size строк; неполный пакет в конце буфера
+    # переносится в следующий, поэтому пакеты, кроме последнего, полные
+    def iter_batches(self, batch_size):
+        inputs = []
+        targets = []
+        size = 0
+        blocks = self.iter_blocks()
+        while True:
+            block = next(blocks, None)
+            if block is not None:
+                inputs.append(block[0])
+                targets.append(block[1])
+                size += len(block[0])
+                if size < self.buffer_size:
+                    continue
+            if not size:
+                return
+
+            x = np.concatenate(inputs)
+            y = np.concatenate(targets)
+            if self.shuffle:
+                permutation = self.rng.permutation(size)
+                x = x[permutation]
+                y = y[permutation]
+            end = size if block is None else size - size % batch_size
+            for start in range(0, end, batch_size):
+                yield x[start:start + batch_size], y[start:start + batch_size]
+            inputs = [x[end:]]
+            targets = [y[end:]]
+            size -= end
+            if block is None:
+                return
+
+    # Мини-пакеты одной эпохи; следующие prefetch пакетов готовит фоновый поток
+    def batches(self, batch_size):
+        ready = queue.Queue(self.prefetch)
+        stop = threading.Event()
+        failures = []
+
+        def produce():
+            try:
+                for batch in self.iter_batches(batch_size):
+                    if not put_until_stopped(ready, batch, stop):
+                        return
+            except BaseException as e:
+                failures.append(e)
+            put_until_stopped(ready, None, stop)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch = get_until_stopped(ready, stop)
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            stop.set()
+            thread.join()
+        if failures:
+            raise failures[0]
@@ -0,0 +1,41 @@
+# Критерии досрочной остановки обучения: достигнутая ошибка, отсутствие
+# улучшения в течение patience эпох и ограничение времени работы
+import time
+
+
+class EarlyStopping:
+    # target_error - остановка, когда ошибка эпохи не больше заданной;
+    # patience - число эпох без улучшения лучшей ошибки больше чем на min_delta;
+    # time_budget - время обучения в секундах (отсчитывается от создания объекта)
+    def __init__(self, target_error=None, patience=None, min_delta=0.0, time_budget=None):
+        self.target_error = target_error
+        self.patience = patience
+        self.min_delta = min_delta
+        self.time_budget = time_budget
+        self.start = time.perf_counter()
+        self.best_error = None
+        self.stale = 0
+
+    # Учёт ошибки завершённой эпохи. Возвращает причину остановки или None
+    def update(self, error):
+        if self.best_error is None or error < self.best_error - self.min_delta:
+            self.best_error = error
+            self.stale = 0
+        else:
+            self.stale += 1
+
+        if self.target_error is not None and error <= self.target_error:
+            return f"ошибка {error} не больше {self.target_error}"
+        if self.patience is not None and self.stale >= self.patience:
+            return f"нет улучшения ошибки {self.patience} эпох подряд"
+        if self.time_budget is not None and time.perf_counter() - self.start >= self.time_budget:
+            return f"истекло время обучения {self.time_budget} с"
+        return None
+
+    # Состояние для контрольной точки (время не сохраняется: бюджет действует на один запуск)
+    def state(self):
+        return {"best_error": self.best_error, "stale": self.stale}
+
+    def restore(self, state):
+        self.best_error = state.get("best_error")
+        self.stale = state.get("stale", 0)
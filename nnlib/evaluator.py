@@ -0,0 +1,323 @@
+# Вычисление функции, заданной графом, без разбора префиксных записей.
+# Граф компилируется в список инструкций в топологическом порядке,
+# регистрами служат номера вершин, каждая вершина вычисляется один раз
+import heapq
+from array import array
+
+import numpy as np
+
+from .column_io import CHUNK_SIZE, ColumnWriter, iter_columns
+from .operators import RowErrors, resolve_operator
+from .toposort import format_cycle, topological_order
+
+
+class Program:
+    # leaves - листья (вершина, значение, ошибка),
+    # instructions - вершины-функции (вершина, операция Operator, аргументы, ошибка) в топологическом порядке.
+    # Операции выбираются из реестра один раз при компиляции.
+    # Ошибка, известная при компиляции, сохраняется и выдаётся при вычислении
+    def __init__(self, graph, operations, leaves, instructions, order):
+        self.graph = graph
+        self.operations = operations
+        self.leaves = leaves
+        self.instructions = instructions
+        self.order = order
+
+    # Вычисление одной вершины-функции по значениям аргументов. Возвращает значение и ошибку.
+    # Ошибка вершины - её собственная ошибка или первая по порядку ошибка аргумента,
+    # как при вычислении выражения слева направо
+    @staticmethod
+    def run_instruction(instruction, values, errors):
+        _, operator, args, error = instruction
+        if error is not None:
+            return None, error
+        for a in args:
+            if errors[a] is not None:
+                return None, errors[a]
+        try:
+            return operator.scalar([values[a] for a in args]), None
+        except Exception as e:
+            return None, e
+
+    # Вычисление всех вершин. Возвращает списки значений и ошибок по номерам вершин
+    def evaluate(self):
+        count = self.graph.vertex_count
+        values = [None] * count
+        errors = [None] * count
+        for v, value, error in self.leaves:
+            values[v] = value
+            errors[v] = error
+
+        run_instruction = self.run_instruction
+        for instruction in self.instructions:
+            v = instruction[0]
+            values[v], errors[v] = run_instruction(instruction, values, errors)
+        return values, errors
+
+    # Пакетное вычисление: columns - столбцы значений листьев (имя -> массив длины size),
+    # остальные листья берут значения из файла операций. Ошибка в части строк
+    # (RowErrors) не останавливает вычисление зависящих вершин: в этих строках
+    # у них NaN, а строки переходят в их ошибку
+    def evaluate_batch(self, columns, size):
+        count = self.graph.vertex_count
+        names = self.graph.names
+        values = [None] * count
+        errors = [None] * count
+        for v, value, error in self.leaves:
+            if names[v] in columns:
+                values[v] = columns[names[v]]
+            else:
+                values[v] = value
+                errors[v] = error
+
+        for v, operator, args, error in self.instructions:
+            row_errors = None
+            if error is None:
+                for a in args:
+                    if isinstance(errors[a], RowErrors):
+                        row_errors = merge_errors(row_errors, errors[a])
+                    elif errors[a] is not None:
+                        error = errors[a]
+                        break
+            if error is None:
+                try:
+                    values[v] = operator.batch([values[a] for a in args], np.empty(size))
+                    errors[v] = row_errors
+                    continue
+                except RowErrors as e:
+                    values[v] = e.values
+                    error = merge_errors(row_errors, e)
+                except Exception as e:
+                    error = e
+            errors[v] = error
+        return values, errors
+
+    # Запись подстановки значений, например "exp(+(2, 23) = 25) = 72004899337.38588".
+    # Выражение раскрывается в дерево, поэтому строится только по запросу
+    def iter_trace(self, values, start):
+        graph = self.graph
+        names = graph.names
+        in_ptr = graph.in_ptr
+        in_src = graph.in_src
+        operations = self.operations
+
+        lo, hi = in_ptr[start], in_ptr[start + 1]
+        if lo == hi:
+            yield str(values[start])
+            return
+        yield f"{operations[names[start]]}("
+        # Кадр стека: [следующая дуга, первая дуга, конец дуг, вершина]
+        stack = [[lo, lo, hi, start]]
+        while stack:
+            frame = stack[-1]
+            pos = frame[0]
+            if pos == frame[2]:
+                stack.pop()
+                yield f") = {values[frame[3]]}"
+                continue
+            frame[0] = pos + 1
+            if pos > frame[1]:
+                yield ", "
+
+            v = in_src[pos]
+            lo, hi = in_ptr[v], in_ptr[v + 1]
+            if lo == hi:
+                yield str(values[v])
+            else:
+                yield f"{operations[names[v]]}("
+                stack.append([lo, lo, hi, v])
+
+    def trace(self, values, start):
+        return "".join(self.iter_trace(values, start))
+
+
+# Значение листа из файла операций и ошибка, если оно не является числом
+def bind_leaf(name, operations):
+    value = operations.get(name)
+    if name not in operations:
+        return value, ValueError(f"Неправильное выражение: {name}")
+    if isinstance(value, str):
+        return value, ValueError(f"{name} должно быть функцией, но является константой.")
+    return value, None
+
+
+# Компиляция графа: листья получают значения из operations, вершины-функции -
+# операции. Ошибки записи operations проверяются здесь, а не при каждом вычислении
+def compile_graph(graph, operations, order=None):
+    if order is None:
+        order, cycle = topological_order(graph)
+        if cycle:
+            raise Exception(f"Обнаружен цикл в графе: {format_cycle(graph, cycle)}")
+
+    names = graph.names
+    in_ptr = graph.in_ptr
+    leaves = []
+    instructions = []
+    for v in order:
+        name = names[v]
+        error = None
+        if in_ptr[v] == in_ptr[v + 1]:
+            value, error = bind_leaf(name, operations)
+            leaves.append((v, value, error))
+        else:
+            operation = operations.get(name)
+            args = tuple(graph.in_arcs(v))
+            operator = None
+            if name not in operations:
+                error = ValueError(f"Неизвестная вершина {name} в выражении.")
+            elif isinstance(operation, (int, float)):
+                error = ValueError(f"{name} должно быть функцией, но является константой.")
+            else:
+                operator = resolve_operator(operation, len(args))
+            instructions.append((v, operator, args, error))
+
+    return Program(graph, operations, leaves, instructions, order)
+
+
+# Одинаковы ли результаты вершины (значение и ошибка)
+def same_result(value, error, other_value, other_error):
+    if error is not None or other_error is not None:
+        return error is not None and other_error is not None and str(error) == str(other_error)
+    return type(value) is type(other_value) and value == other_value
+
+
+# Сессия вычислений: значения всех вершин хранятся между обновлениями.
+# При изменении листьев пересчитываются только зависящие от них вершины,
+# в топологическом порядке и не более одного раза каждая
+class EvaluationSession:
+    def __init__(self, program, roots=None):
+        self.program = program
+        self.roots = list(roots) if roots is not None else program.graph.sinks()
+        self.values, self.errors = program.evaluate()
+        self.index_instructions()
+
+    # Номер инструкции для каждой вершины (-1 у листьев)
+    def index_instructions(self):
+        self.slot = array("i", [-1]) * self.program.graph.vertex_count
+        for k, instruction in enumerate(self.program.instructions):
+            self.slot[instruction[0]] = k
+
+    # Новые значения листьев: имя -> число. Возвращает изменившиеся стоки
+    def update(self, leaf_values):
+        graph = self.program.graph
+        for name in leaf_values:
+            v = graph.index.get(name)
+            if v is None or graph.in_degree(v):
+                raise ValueError(f"{name} не является листом графа")
+        self.program.operations.update(leaf_values)
+        return self.propagate(leaf_values)
+
+    # Пересчёт после изменения привязок листьев names в файле операций
+    def propagate(self, names):
+        graph = self.program.graph
+        operations = self.program.operations
+        instructions = self.program.instructions
+        out_ptr = graph.out_ptr
+        out_dst = graph.out_dst
+        values = self.values
+        errors = self.errors
+        changed = bytearray(graph.vertex_count)
+        queued = bytearray(len(instructions))
+        # Очередь по номеру инструкции, то есть по топологическому порядку
+        heap = []
+
+        def schedule(v):
+            changed[v] = 1
+            for j in range(out_ptr[v], out_ptr[v + 1]):
+                k = self.slot[out_dst[j]]
+                if not queued[k]:
+                    queued[k] = 1
+                    heapq.heappush(heap, k)
+
+        for name in names:
+            v = graph.index[name]
+            value, error = bind_leaf(name, operations)
+            if not same_result(value, error, values[v], errors[v]):
+                values[v], errors[v] = value, error
+                schedule(v)
+
+        while heap:
+            k = heapq.heappop(heap)
+            instruction = instructions[k]
+            v = instruction[0]
+            value, error = self.program.run_instruction(instruction, values, errors)
+            if not same_result(value, error, values[v], errors[v]):
+                values[v], errors[v] = value, error
+                schedule(v)
+
+        return [root for root in self.roots if changed[root]]
+
+    # Переход к новому содержимому файла операций. Если изменились только листья,
+    # пересчёт инкрементальный, иначе граф компилируется заново
+    def reload(self, operations):
+        graph = self.program.graph
+        old = self.program.operations
+        changed_leaves = []
+        for v in range(graph.vertex_count):
+            name = graph.names[v]
+            if (name in old) == (name in operations) and old.get(name) == operations.get(name) \
+                    and type(old.get(name)) is type(operations.get(name)):
+                continue
+            if graph.in_degree(v):
+                return self.recompile(operations)
+            changed_leaves.append(name)
+
+        self.program.operations = dict(operations)
+        return self.propagate(changed_leaves)
+
+    def recompile(self, operations):
+        old_values, old_errors = self.values, self.errors
+        self.program = compile_graph(self.program.graph, dict(operations), self.program.order)
+        self.values, self.errors = self.program.evaluate()
+        self.index_instructions()
+        return [root for root in self.roots
+                if not same_result(self.values[root], self.errors[root], old_values[root], old_errors[root])]
+
+
+# Ошибка стока, накопленная по порциям: первая ошибка, а ошибки в строках
+# (RowErrors) объединяются
+def merge_errors(error, other):
+    if error is None:
+        return other
+    if isinstance(error, RowErrors) and isinstance(other, RowErrors):
+        return error.merged(other)
+    return error
+
+
+# Пакетное вычисление стоков roots для всех строк файла значений листьев.
+# Результаты записываются порциями: по столбцу на сток, вычисленный в первой порции.
+# Если такой сток не вычисляется в одной из следующих порций, в её строки
+# записывается NaN, а строки попадают в его ошибку RowErrors.
+# Возвращает число строк и ошибки стоков, объединённые по всем порциям
+def evaluate_batch_file(program, roots, input_path, output_path, chunk_size=CHUNK_SIZE):
+    names = program.graph.names
+    writer = None
+    merged = {root: None for root in roots}
+    rows = 0
+    try:
+        for columns in iter_columns(input_path, chunk_size):
+            size = len(next(iter(columns.values())))
+            values, errors = program.evaluate_batch(columns, size)
+            if writer is None:
+                good = [root for root in roots if errors[root] is None or isinstance(errors[root], RowErrors)]
+                writer = ColumnWriter(output_path, [names[root] for root in good])
+            for root in good:
+                if errors[root] is not None and not isinstance(errors[root], RowErrors):
+                    errors[root] = RowErrors(errors[root], [(0, size)])
+                    values[root] = np.full(size, np.nan)
+            for root in roots:
+                error = errors[root]
+                if isinstance(error, RowErrors):
+                    error = error.shifted(rows)
+                merged[root] = merge_errors(merged[root], error)
+            writer.write([values[root] for root in good], size)
+            rows += size
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        _, errors = program.evaluate_batch({}, 0)
+        ColumnWriter(output_path, [names[root] for root in roots if errors[root] is None]).close()
+        merged = {root: errors[root] for root in roots}
+    return rows, merged
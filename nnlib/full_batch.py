@@ -0,0 +1,221 @@
+# Полнопакетные методы для небольших полносвязных сетей: сопряжённые градиенты
+# (Флетчер-Ривс, Полак-Рибьер) с линейным поиском и L-BFGS. Все веса сети лежат
+# в одном векторе (слои - его представления), градиент по всей выборке
+# вычисляется матричными операциями BackpropWorkspace сразу в таком же векторе
+import numpy as np
+
+from .backprop import BackpropWorkspace
+
+
+# Целевая функция: ошибка сети (сумма квадратов) на всей выборке.
+# Слои network заменяются представлениями вектора weights, поэтому изменения
+# вектора сразу видны в сети. chunk_size - наибольшее число образцов в одном
+# проходе (по умолчанию вся выборка), градиенты порций суммируются
+class FullBatchObjective:
+    def __init__(self, network, inputs, targets, chunk_size=None):
+        self.network = network
+        self.inputs = inputs
+        self.targets = targets
+        self.chunk_size = min(chunk_size or len(inputs), len(inputs))
+        self.weights = np.empty(sum(layer.size for layer in network))
+        # Антиградиент половины ошибки: направление наискорейшего убывания
+        # в знаке обновления обратного распространения
+        self.direction = np.empty_like(self.weights)
+        self.workspace = BackpropWorkspace(network, self.chunk_size)
+        partial = self.direction if self.chunk_size == len(inputs) else np.empty_like(self.weights)
+        offset = 0
+        for i, layer in enumerate(network):
+            view = self.weights[offset:offset + layer.size].reshape(layer.shape)
+            view[...] = layer
+            network[i] = view
+            self.workspace.gradients[i] = partial[offset:offset + layer.size].reshape(layer.shape)
+            offset += layer.size
+        self.partial = partial
+        self.evaluations = 0
+
+    # Ошибка в текущей точке; антиградиент записывается в direction
+    def evaluate(self):
+        self.evaluations += 1
+        total_error = 0.0
+        for start in range(0, len(self.inputs), self.chunk_size):
+            stop = start + self.chunk_size
+            total_error += self.workspace.compute_gradients(self.network, self.inputs[start:stop],
+                                                            self.targets[start:stop])
+            if self.partial is not self.direction:
+                if start == 0:
+                    np.copyto(self.direction, self.partial)
+                else:
+                    self.direction += self.partial
+        return total_error
+
+
+# Линейный поиск с возвратом (условие Армихо) вдоль search из точки base.
+# slope - производная половины ошибки по шагу (отрицательна для направления убывания).
+# Возвращает принятый шаг и ошибку в новой точке или 0 и None, если шаг не найден
+def line_search(objective, base, search, error, slope, step, c1=1e-4, shrink=0.5, max_trials=40):
+    weights = objective.weights
+    for _ in range(max_trials):
+        np.multiply(search, step, out=weights)
+        weights += base
+        new_error = objective.evaluate()
+        if new_error / 2 <= error / 2 + c1 * step * slope:
+            return step, new_error
+        step *= shrink
+    np.copyto(weights, base)
+    return 0.0, None
+
+
+# Общая часть полнопакетных методов: step() выполняет одну итерацию и
+# возвращает ошибку до неё, как ошибка эпохи у пошаговых методов
+class FullBatchMethod:
+    def __init__(self, objective):
+        self.objective = objective
+        self.error = objective.evaluate()
+        self.base = np.empty_like(objective.weights)
+        self.search = np.empty_like(objective.weights)
+        self.step_size = None
+
+    # Шаг вдоль self.search с начальной длиной step. Возвращает принятый шаг
+    def move(self, step):
+        objective = self.objective
+        slope = -np.vdot(objective.direction, self.search)
+        np.copyto(self.base, objective.weights)
+        step, error = line_search(objective, self.base, self.search, self.error, slope, step)
+        if error is None:
+            # Восстановление антиградиента в исходной точке
+            objective.evaluate()
+        else:
+            self.error = error
+        return step
+
+    # Начальная длина первого шага: сдвиг весов на единицу по норме
+    def first_step(self):
+        return 1.0 / max(np.linalg.norm(self.search), 1e-12)
+
+
+# Нелинейные сопряжённые градиенты: variant "FR" (Флетчер-Ривс) или "PR"
+# (Полак-Рибьер с обнулением отрицательных beta). Направление сбрасывается
+# на антиградиент каждые restart итераций (по умолчанию - число весов) и когда
+# оно перестаёт быть направлением убывания
+class ConjugateGradientSearch(FullBatchMethod):
+    def __init__(self, objective, variant="PR", restart=None):
+        super().__init__(objective)
+        if variant not in ("FR", "PR"):
+            raise ValueError(f"Неизвестный вариант метода сопряжённых градиентов: {variant}")
+        self.variant = variant
+        self.restart = restart or len(objective.weights)
+        self.previous = np.empty_like(objective.weights)
+        self.previous_norm = None
+        self.previous_slope = None
+        self.iteration = 0
+
+    def step(self):
+        error = self.error
+        direction = self.objective.direction
+        norm = np.vdot(direction, direction)
+        beta = 0.0
+        if self.previous_norm and self.iteration % self.restart:
+            if self.variant == "FR":
+                beta = norm / self.previous_norm
+            else:
+                beta = max(0.0, (norm - np.vdot(direction, self.previous)) / self.previous_norm)
+        self.search *= beta
+        self.search += direction
+        slope = -np.vdot(direction, self.search)
+        if beta and slope >= 0:
+            np.copyto(self.search, direction)
+            slope = -norm
+
+        # Начальный шаг - из предположения, что убывание первого порядка
+        # на шаге не изменится (Нокедаль, Райт)
+        if self.step_size:
+            step = self.step_size * self.previous_slope / slope
+        else:
+            step = self.first_step()
+        np.copyto(self.previous, direction)
+        self.previous_norm = norm
+        self.previous_slope = slope
+        self.step_size = self.move(step)
+        # Неудачный поиск - рестарт с антиградиента
+        self.iteration = self.iteration + 1 if self.step_size else 0
+        return error
+
+
+# L-BFGS: приближение обратного гессиана по последним memory парам
+# (сдвиг весов, изменение градиента), направление - двухпетлевой рекурсией.
+# Пары хранятся в заранее выделенных матрицах по кругу
+class LBFGS(FullBatchMethod):
+    def __init__(self, objective, memory=10):
+        super().__init__(objective)
+        size = len(objective.weights)
+        self.memory = memory
+        self.shifts = np.empty((memory, size))
+        self.changes = np.empty((memory, size))
+        self.rho = np.empty(memory)
+        self.alpha = np.empty(memory)
+        self.scratch = np.empty(size)
+        self.previous = np.empty(size)
+        self.count = 0
+        self.newest = -1
+
+    # search = H * антиградиент
+    def compute_search(self):
+        search = self.search
+        scratch = self.scratch
+        np.copyto(search, self.objective.direction)
+        if not self.count:
+            return
+        slots = [(self.newest - k) % self.memory for k in range(self.count)]
+        for k in slots:
+            self.alpha[k] = self.rho[k] * np.vdot(self.shifts[k], search)
+            np.multiply(self.changes[k], self.alpha[k], out=scratch)
+            search -= scratch
+        newest = self.newest
+        search *= 1.0 / (self.rho[newest] * np.vdot(self.changes[newest], self.changes[newest]))
+        for k in reversed(slots):
+            beta = self.rho[k] * np.vdot(self.changes[k], search)
+            np.multiply(self.shifts[k], self.alpha[k] - beta, out=scratch)
+            search += scratch
+
+    def step(self):
+        error = self.error
+        direction = self.objective.direction
+        self.compute_search()
+        if np.vdot(direction, self.search) <= 0:
+            # Приближение испорчено: сброс памяти и шаг по антиградиенту
+            self.count = 0
+            np.copyto(self.search, direction)
+        step = 1.0 if self.count else self.first_step()
+        np.copyto(self.previous, direction)
+        step = self.move(step)
+        if not step:
+            self.count = 0
+            return error
+
+        # Новая пара: s = шаг * направление, y = изменение градиента = прежний - новый антиградиент
+        slot = (self.newest + 1) % self.memory
+        shift = self.shifts[slot]
+        change = self.changes[slot]
+        np.multiply(self.search, step, out=shift)
+        np.subtract(self.previous, direction, out=change)
+        curvature = np.vdot(shift, change)
+        if curvature > 1e-12:
+            self.rho[slot] = 1.0 / curvature
+            self.newest = slot
+            self.count = min(self.count + 1, self.memory)
+        return error
+
+
+FULL_BATCH_METHODS = {
+    "FletcherReeves": lambda objective: ConjugateGradientSearch(objective, "FR"),
+    "PolakRibiere": lambda objective: ConjugateGradientSearch(objective, "PR"),
+    "LBFGS": LBFGS,
+}
+
+
+# Полнопакетный метод по имени для сети network и выборки (inputs, targets)
+def make_full_batch_method(method, network, inputs, targets, chunk_size=None):
+    factory = FULL_BATCH_METHODS.get(method)
+    if factory is None:
+        raise ValueError(f"Неизвестный метод: {method}")
+    return factory(FullBatchObjective(network, inputs, targets, chunk_size))
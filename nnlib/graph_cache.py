@@ -0,0 +1,146 @@
+# Двоичный кэш проверенного графа рядом с входным файлом ("<файл>.graphcache").
+# Хранит номера вершин, дуги, индексы входящих и исходящих дуг, топологический
+# порядок и стоки. Ключ - SHA-256 содержимого входного файла: при совпадении граф
+# отображается в память без копирования массивов и повторно не проверяется
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+from .graph_parser import ORDER_TYPE
+from .graph_store import INDEX_TYPE, OFFSET_TYPE, SUMMARY_LIMIT, CompactGraph
+from .toposort import format_cycle, topological_order
+from .xml_io import load_graph_file
+
+CACHE_SUFFIX = ".graphcache"
+MAGIC = b"NNGC"
+VERSION = 1
+# Сигнатура, версия, хэш, число вершин, дуг, вершин в порядке, стоков, байт имён
+HEADER = struct.Struct("<4sI32s5q")
+HASH_BLOCK = 1 << 20
+
+
+def cache_path(file_path):
+    return file_path + CACHE_SUFFIX
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+# Массивы в порядке записи: сначала 8-байтовые, затем 4-байтовые, чтобы все
+# они оставались выровненными. Длины выражены через числа из заголовка
+def _layout(vertex_count, arc_count, order_count, sink_count):
+    return [
+        ("in_ptr", OFFSET_TYPE, vertex_count + 1),
+        ("out_ptr", OFFSET_TYPE, vertex_count + 1),
+        ("arc_order", ORDER_TYPE, arc_count),
+        ("arc_src", INDEX_TYPE, arc_count),
+        ("arc_dst", INDEX_TYPE, arc_count),
+        ("in_src", INDEX_TYPE, arc_count),
+        ("out_dst", INDEX_TYPE, arc_count),
+        ("order", INDEX_TYPE, order_count),
+        ("roots", INDEX_TYPE, sink_count),
+    ]
+
+
+# Сохранение проверенного графа (без циклов) с его порядком и стоками.
+# Файл записывается во временный с уникальным именем и затем атомарно
+# заменяет старый кэш, так что параллельные процессы не мешают друг другу
+def store_graph_cache(file_path, graph, order, roots, digest=None):
+    if digest is None:
+        digest = file_digest(file_path)
+    names = "\n".join(graph.names).encode("UTF-8")
+    arrays = {
+        "in_ptr": graph.in_ptr, "out_ptr": graph.out_ptr, "arc_order": graph.arc_order,
+        "arc_src": graph.arc_src, "arc_dst": graph.arc_dst, "in_src": graph.in_src,
+        "out_dst": graph.out_dst, "order": array(INDEX_TYPE, order), "roots": array(INDEX_TYPE, roots),
+    }
+    path = cache_path(file_path)
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+                                    suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(HEADER.pack(MAGIC, VERSION, digest, graph.vertex_count, graph.arc_count,
+                                len(order), len(roots), len(names)))
+            for name, _, _ in _layout(graph.vertex_count, graph.arc_count, len(order), len(roots)):
+                f.write(memoryview(arrays[name]).cast("B"))
+            f.write(names)
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+# Загрузка графа из кэша. Возвращает (граф, порядок, стоки) или None,
+# если кэша нет, он другой версии, обрезан или построен по другому содержимому файла
+def load_graph_cache(file_path, digest=None):
+    path = cache_path(file_path)
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            return None
+        magic, version, cached_digest, vertex_count, arc_count, order_count, sink_count, names_size = \
+            HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            return None
+        counts = (vertex_count, arc_count, order_count, sink_count)
+        if min(counts + (names_size,)) < 0:
+            return None
+        layout = _layout(*counts)
+        expected = HEADER.size + sum(length * array(typecode).itemsize for _, typecode, length in layout) + names_size
+        if os.fstat(f.fileno()).st_size != expected:
+            return None
+        if cached_digest != (digest if digest is not None else file_digest(file_path)):
+            return None
+        # Отображение остаётся открытым, пока на него ссылаются массивы графа
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    arrays = {}
+    offset = HEADER.size
+    for name, typecode, length in layout:
+        size = length * array(typecode).itemsize
+        arrays[name] = data[offset:offset + size].cast(typecode)
+        offset += size
+    names = bytes(data[offset:offset + names_size]).decode("UTF-8").split("\n") if vertex_count else []
+    if len(names) != vertex_count:
+        return None
+    index = dict(zip(names, range(vertex_count)))
+
+    graph = CompactGraph(names, index, arrays["arc_src"], arrays["arc_dst"], arrays["arc_order"],
+                         arrays["in_ptr"], arrays["in_src"], arrays["out_ptr"], arrays["out_dst"])
+    return graph, arrays["order"], list(arrays["roots"])
+
+
+# Чтение и проверка графа для nntask2 и nntask3: сводка графа выводится
+# (verbose=True - целиком), цикл - исключение. При cache=True проверенный граф
+# сохраняется в кэш рядом с файлом и, пока файл не изменится, загружается из него
+# без проверок. Возвращает (граф, топологический порядок, стоки)
+def read_checked_graph(in_file, i, cache=False, verbose=False):
+    digest = file_digest(in_file) if cache else None
+    cached = load_graph_cache(in_file, digest) if cache else None
+    if cached is not None:
+        graph, order, roots = cached
+    else:
+        graph = load_graph_file(in_file)
+    print(f"Файл {i}: {in_file}")
+    print(*graph.summary(None if verbose else SUMMARY_LIMIT), sep="\n")
+
+    if cached is None:
+        order, cycle = topological_order(graph)
+        if cycle:
+            raise Exception(f"Обнаружен цикл в графе: {format_cycle(graph, cycle)}")
+        roots = graph.sinks()
+        if cache:
+            store_graph_cache(in_file, graph, order, roots, digest)
+    return graph, order, roots
@@ -0,0 +1,152 @@
+# Потоковое чтение графа, заданного строкой вида "(v1, v2, n), (v3, v4, m), ..."
+from array import array
+
+from .graph_store import INDEX_TYPE, CompactGraph, group_arcs
+
+# Размер порции, читаемой из файла за один раз
+CHUNK_SIZE = 1 << 20
+
+# Тип элементов массива номеров дуг
+ORDER_TYPE = "q"
+
+FORMAT_ERROR = "Неправильный формат данных: количество элементов должно быть кратно 3"
+
+
+# Проверка корректности записи вершин
+def check_vertex(vertex):
+    # Вершина должна состоять из символа 'v' и числа
+    if len(vertex) < 2 or vertex[0] != "v" or not vertex[1:].isdigit():
+        return False
+    return True
+
+
+# Разбиение потока на элементы, разделённые запятыми (скобки отбрасываются).
+# Файл читается порциями, поэтому его размер не ограничен объёмом памяти
+def iter_tokens(stream, chunk_size=CHUNK_SIZE):
+    tail = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        parts = (tail + chunk.replace("(", "").replace(")", "")).split(",")
+        # Последний элемент может продолжиться в следующей порции
+        tail = parts.pop()
+        yield from parts
+    yield tail
+
+
+# Группировка дуг по концам с проверкой дубликатов и порядка входящих дуг.
+# Возвращает смещения и начала входящих дуг, упорядоченные по номеру дуги,
+# номер первой (в порядке записи) повторной дуги и вершину с нарушенным порядком
+def index_in_arcs(vertex_count, arc_src, arc_dst, arc_order):
+    in_ptr, grouped = group_arcs(arc_dst, vertex_count)
+    in_src = array(INDEX_TYPE, [-1]) * len(arc_dst)
+    duplicate = -1
+    bad_vertex = -1
+
+    for v in range(vertex_count):
+        lo = in_ptr[v]
+        hi = in_ptr[v + 1]
+        size = hi - lo
+        # Номера входящих дуг должны быть перестановкой чисел 1..size:
+        # тогда каждая дуга сразу встаёт на своё место
+        regular = True
+        for j in range(lo, hi):
+            k = grouped[j]
+            slot = lo + arc_order[k] - 1
+            if slot >= hi or in_src[slot] != -1:
+                regular = False
+                break
+            in_src[slot] = arc_src[k]
+        if regular:
+            continue
+
+        seen = set()
+        for j in range(lo, hi):
+            k = grouped[j]
+            arc = (arc_src[k], arc_order[k])
+            if arc in seen:
+                if duplicate == -1 or k < duplicate:
+                    duplicate = k
+                break
+            seen.add(arc)
+        # Сообщаем о вершине, которая раньше других встретилась как конец дуги
+        if bad_vertex == -1 or grouped[lo] < grouped[in_ptr[bad_vertex]]:
+            bad_vertex = v
+
+    return in_ptr, in_src, grouped, duplicate, bad_vertex
+
+
+# Чтение графа из последовательности элементов в компактное хранилище.
+# Дубликаты дуг ищутся группировкой по концам, поэтому время работы линейно по числу дуг
+def read_graph(data):
+    tokens = iter(data)
+    names = []
+    index = {}
+    arc_src = array(INDEX_TYPE)
+    arc_dst = array(INDEX_TYPE)
+    arc_order = array(ORDER_TYPE)
+    count = 0
+
+    def duplicate_message(k):
+        return f"Ребро указано дважды: {(names[arc_src[k]], names[arc_dst[k]], arc_order[k])}"
+
+    def fail(message):
+        # Как и при разборе всей строки сразу, ошибка количества элементов
+        # имеет приоритет над остальными: дочитываем поток только в случае ошибки
+        total = count + sum(1 for _ in tokens)
+        if total % 3 != 0:
+            message = FORMAT_ERROR
+        else:
+            # Повторная дуга, записанная раньше ошибочной, обнаруживается первой
+            duplicate = index_in_arcs(len(names), arc_src, arc_dst, arc_order)[3]
+            if duplicate != -1:
+                message = duplicate_message(duplicate)
+        raise Exception(message)
+
+    def intern(vertex):
+        v = index.get(vertex)
+        if v is None:
+            v = index[vertex] = len(names)
+            names.append(vertex)
+        return v
+
+    for v1 in tokens:
+        v2 = next(tokens, None)
+        n = next(tokens, None)
+        if n is None:
+            raise Exception(FORMAT_ERROR)
+        count += 3
+
+        v1 = v1.strip()
+        v2 = v2.strip()
+        n = n.strip()
+
+        # Уже встречавшиеся имена проверены ранее
+        if (v1 not in index and not check_vertex(v1)) or (v2 not in index and not check_vertex(v2)):
+            fail(f"Неправильная запись векторов: {v1}, {v2}")
+
+        if not n.isdigit():
+            fail(f"'{n}' не является числом")
+        n = int(n)
+        if n <= 0:
+            fail(f"Номер дуги должен быть положительным числом: {n}")
+
+        arc_src.append(intern(v1))
+        arc_dst.append(intern(v2))
+        arc_order.append(n)
+
+    in_ptr, in_src, grouped, duplicate, bad_vertex = index_in_arcs(len(names), arc_src, arc_dst, arc_order)
+    if duplicate != -1:
+        raise Exception(duplicate_message(duplicate))
+    if bad_vertex != -1:
+        orders = [arc_order[grouped[j]] for j in range(in_ptr[bad_vertex], in_ptr[bad_vertex + 1])]
+        raise Exception(f"Порядок входящих дуг нарушен для вершины {names[bad_vertex]}: {orders}")
+
+    return CompactGraph(names, index, arc_src, arc_dst, arc_order, in_ptr, in_src)
+
+
+# Чтение графа из файла любого размера
+def read_graph_file(file_path, chunk_size=CHUNK_SIZE):
+    with open(file_path, "r", encoding="UTF-8") as f:
+        return read_graph(iter_tokens(f, chunk_size))
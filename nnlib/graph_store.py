@@ -0,0 +1,101 @@
+# Компактное хранилище графа: имена вершин заменены целыми номерами,
+# дуги лежат в массивах array, а не в списках кортежей строк
+import heapq
+from array import array
+from itertools import islice
+
+# Тип элементов массивов с номерами вершин и дуг
+INDEX_TYPE = "i"
+# Тип элементов массивов смещений
+OFFSET_TYPE = "q"
+# Число вершин и дуг, выводимых в сводке графа
+SUMMARY_LIMIT = 20
+
+
+# Сортировка подсчётом: номера дуг, сгруппированные по ключу с сохранением
+# исходного порядка внутри группы, и массив смещений групп
+def group_arcs(keys, size):
+    ptr = array(OFFSET_TYPE, bytes(8 * (size + 1)))
+    for key in keys:
+        ptr[key + 1] += 1
+    for v in range(size):
+        ptr[v + 1] += ptr[v]
+
+    pos = array(OFFSET_TYPE, ptr)
+    grouped = array(INDEX_TYPE, bytes(4 * len(keys)))
+    for k, key in enumerate(keys):
+        grouped[pos[key]] = k
+        pos[key] += 1
+    return ptr, grouped
+
+
+class CompactGraph:
+    # names - имена вершин по номерам, arc_src/arc_dst/arc_order - дуги в порядке записи.
+    # in_ptr/in_src - входящие дуги (CSC), упорядоченные по номеру дуги,
+    # out_ptr/out_dst - исходящие дуги (CSR) в порядке записи
+    def __init__(self, names, index, arc_src, arc_dst, arc_order, in_ptr, in_src, out_ptr=None, out_dst=None):
+        self.names = names
+        self.index = index
+        self.arc_src = arc_src
+        self.arc_dst = arc_dst
+        self.arc_order = arc_order
+        self.in_ptr = in_ptr
+        self.in_src = in_src
+        if out_ptr is None:
+            out_ptr, grouped = group_arcs(arc_src, len(names))
+            out_dst = array(INDEX_TYPE, (arc_dst[k] for k in grouped))
+        self.out_ptr = out_ptr
+        self.out_dst = out_dst
+
+    @property
+    def vertex_count(self):
+        return len(self.names)
+
+    @property
+    def arc_count(self):
+        return len(self.arc_src)
+
+    # Номера вершин в порядке сортировки имён
+    def sorted_ids(self):
+        return sorted(range(len(self.names)), key=self.names.__getitem__)
+
+    # Отсортированные имена вершин
+    def vertices(self):
+        return sorted(self.names)
+
+    # Дуги в порядке записи в виде кортежей (v1, v2, n)
+    def edges(self):
+        names = self.names
+        for s, d, n in zip(self.arc_src, self.arc_dst, self.arc_order):
+            yield names[s], names[d], n
+
+    # Строки сводки для вывода: списки вершин и дуг целиком, если их не больше
+    # limit (None - без ограничения), иначе их число и первые limit элементов
+    def summary(self, limit=SUMMARY_LIMIT):
+        if limit is None or self.vertex_count <= limit:
+            vertices = f"Вершины: {self.vertices()}"
+        else:
+            vertices = f"Вершины ({self.vertex_count}): {heapq.nsmallest(limit, self.names)} ..."
+        if limit is None or self.arc_count <= limit:
+            arcs = f"Граф: {list(self.edges())}"
+        else:
+            arcs = f"Граф ({self.arc_count} дуг): {list(islice(self.edges(), limit))} ..."
+        return vertices, arcs
+
+    # Начала входящих дуг вершины, упорядоченные по номеру дуги
+    def in_arcs(self, v):
+        return self.in_src[self.in_ptr[v]:self.in_ptr[v + 1]]
+
+    # Концы исходящих дуг вершины
+    def out_arcs(self, v):
+        return self.out_dst[self.out_ptr[v]:self.out_ptr[v + 1]]
+
+    def in_degree(self, v):
+        return self.in_ptr[v + 1] - self.in_ptr[v]
+
+    def out_degree(self, v):
+        return self.out_ptr[v + 1] - self.out_ptr[v]
+
+    # Стоки графа (вершины без исходящих дуг) в порядке сортировки имён
+    def sinks(self):
+        return [v for v in self.sorted_ids() if self.out_ptr[v + 1] == self.out_ptr[v]]
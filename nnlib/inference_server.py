@@ -0,0 +1,167 @@
+# Сервер вычислений для нескольких сетей, постоянно находящихся в памяти.
+# Запросы к одной сети, пришедшие почти одновременно, объединяются в один
+# пакет (micro-batching) и проходят сеть за одно матричное умножение на слой.
+# Протокол строковый: запрос "имя: x1, x2, ...; y1, y2, ..." (векторы через ";"),
+# ответ "ok: выход1; выход2" или "error: сообщение" - по строке на запрос, в том же порядке
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Наибольшее число векторов в пакете и время ожидания попутных запросов, с
+MAX_BATCH = 1024
+MAX_DELAY = 0.002
+
+
+# Очередь запросов к одной сети и поток, вычисляющий их пакетами
+class MicroBatcher:
+    def __init__(self, network, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.network = network
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Постановка векторов (матрица N x d) в очередь. Результат - Future с матрицей N x k
+    def submit(self, vectors):
+        vectors = np.asarray(vectors, dtype=self.network.dtype)
+        if vectors.ndim != 2 or vectors.shape[1] != self.network.input_size:
+            raise ValueError("Длина входного вектора не совпадает с матрицей весов")
+        future = Future()
+        self.requests.put((vectors, future))
+        return future
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            item = self.requests.get()
+            if item is None:
+                break
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.max_delay
+            while rows < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self.compute(batch)
+
+    def compute(self, batch):
+        try:
+            outputs = self.network.forward(np.concatenate([vectors for vectors, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for vectors, future in batch:
+            future.set_result(outputs[start:start + len(vectors)])
+            start += len(vectors)
+
+    def close(self):
+        self.requests.put(None)
+        self.thread.join()
+
+
+# Вектор из записи "x1, x2, ..."
+def parse_vector(text):
+    try:
+        return [float(x) for x in text.split(",")]
+    except ValueError:
+        raise ValueError(f"Неправильная запись вектора: {text.strip()}")
+
+
+class InferenceServer:
+    # networks - словарь имя -> Network
+    def __init__(self, networks, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.batchers = {name: MicroBatcher(network, max_batch, max_delay) for name, network in networks.items()}
+
+    def submit(self, name, vectors):
+        batcher = self.batchers.get(name)
+        if batcher is None:
+            raise ValueError(f"Неизвестная сеть: {name}")
+        return batcher.submit(vectors)
+
+    # Разбор строки запроса и постановка в очередь. Ошибка разбора возвращается как готовый Future
+    def submit_line(self, line):
+        try:
+            name, _, body = line.partition(":")
+            if not body.strip():
+                raise ValueError("Запрос должен иметь вид 'имя: x1, x2, ...; y1, y2, ...'")
+            vectors = [parse_vector(vector) for vector in body.split(";")]
+            if len({len(vector) for vector in vectors}) != 1:
+                raise ValueError("Векторы запроса должны быть одной длины")
+            return self.submit(name.strip(), vectors)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    # Обработка потока строк: запросы ставятся в очередь сразу по мере чтения,
+    # ответы пишутся отдельным потоком в порядке запросов
+    def serve_lines(self, infile, outfile):
+        pending = queue.Queue()
+
+        def write():
+            while True:
+                future = pending.get()
+                if future is None:
+                    return
+                try:
+                    outputs = future.result()
+                    response = "ok: " + "; ".join(", ".join(map(str, row)) for row in outputs.tolist())
+                except Exception as e:
+                    response = f"error: {e}"
+                outfile.write(response + "\n")
+                if pending.empty():
+                    outfile.flush()
+
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+        try:
+            for line in infile:
+                if line.strip():
+                    pending.put(self.submit_line(line))
+        finally:
+            pending.put(None)
+            writer.join()
+            outfile.flush()
+
+    # Сервер на Unix-сокете: каждое соединение обслуживается своим потоком,
+    # запросы разных клиентов объединяются в общие пакеты
+    def serve_unix(self, socket_path):
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with self.request.makefile("r", encoding="UTF-8") as infile, \
+                        self.request.makefile("w", encoding="UTF-8") as outfile:
+                    server.serve_lines(infile, outfile)
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as unix_server:
+            unix_server.daemon_threads = True
+            try:
+                unix_server.serve_forever()
+            finally:
+                os.remove(socket_path)
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+
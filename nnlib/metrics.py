@@ -0,0 +1,286 @@
+# Журнал метрик обучения с ограниченной памятью: записи копятся в списке и
+# порциями по BATCH_SIZE переносятся в кольцевой буфер фиксированного размера,
+# фоновый поток форматирует их и сбрасывает в файл.
+# Формат файла выбирается по расширению:
+# .csv - заголовок из имён столбцов и строки чисел;
+# .bin - двоичный столбцовый формат: заголовок, имена столбцов, затем записи
+#        float64 подряд, выровненные по 64 байтам, читаются через np.memmap;
+# иначе - текст, строка на запись по шаблону line_format
+import os
+import string
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Число записей в кольцевом буфере
+RING_SIZE = 4096
+# Число записей, переносимых в буфер за один захват блокировки
+BATCH_SIZE = 256
+# Наибольшее время между сбросами буфера в файл, с
+FLUSH_INTERVAL = 1.0
+
+MAGIC = b"NNML"
+VERSION = 1
+# Сигнатура, версия, число столбцов, длина имён столбцов
+HEADER = struct.Struct("<4sIQQ")
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def metrics_format(file_path):
+    if file_path.endswith(".csv"):
+        return "csv"
+    if file_path.endswith(".bin"):
+        return "bin"
+    return "text"
+
+
+# Смещение записей в двоичном файле и имена столбцов
+def _read_bin_header(f):
+    header = f.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise ValueError("Файл метрик повреждён: неполный заголовок")
+    magic, version, count, length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Неизвестный формат файла метрик")
+    columns = f.read(length).decode("UTF-8").split("\n")[:count]
+    return _aligned(HEADER.size + length), columns
+
+
+# Шаблон строки с именами столбцов -> шаблон с номерами позиций
+def _positional_format(line_format, columns):
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(line_format):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is not None:
+            parts.append("{" + str(columns.index(field)) + ("!" + conversion if conversion else "")
+                         + (":" + spec if spec else "") + "}")
+    return "".join(parts)
+
+
+# Числа строки текстового журнала или CSV (слова и знаки пропускаются)
+def _line_numbers(line):
+    numbers = []
+    for token in line.replace(",", " ").replace(":", " ").replace("=", " ").split():
+        try:
+            numbers.append(float(token))
+        except ValueError:
+            pass
+    return numbers
+
+
+# Удаление записей с номером итерации больше iteration (первый столбец) -
+# продолжение журнала после возобновления с контрольной точки
+def truncate_metrics(file_path, iteration):
+    if not os.path.exists(file_path):
+        return
+    if metrics_format(file_path) == "bin":
+        with open(file_path, "rb") as f:
+            offset, columns = _read_bin_header(f)
+        rows = read_metrics(file_path)[columns[0]]
+        # Первая запись после контрольной точки или нарушающая возрастание номеров
+        stale = rows > iteration
+        stale[1:] |= rows[1:] <= rows[:-1]
+        keep = int(np.argmax(stale)) if stale.any() else len(rows)
+        os.truncate(file_path, offset + keep * 8 * len(columns))
+        return
+
+    # Текст и CSV: номер итерации - первое число строки
+    offset = 0
+    with open(file_path, "rb") as f:
+        if metrics_format(file_path) == "csv":
+            offset += len(f.readline())
+        for line in f:
+            numbers = _line_numbers(line.decode("UTF-8"))
+            if not line.endswith(b"\n") or numbers and numbers[0] > iteration:
+                break
+            offset += len(line)
+    os.truncate(file_path, offset)
+
+
+class MetricsLogger:
+    # columns - имена столбцов записи (первый - номер итерации);
+    # line_format - шаблон строки текстового файла с именами столбцов;
+    # append - дописывать в существующий файл (после truncate_metrics)
+    def __init__(self, file_path, columns, line_format=None, append=False,
+                 capacity=RING_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.columns = list(columns)
+        self.format = metrics_format(file_path)
+        if self.format == "csv":
+            line_format = ",".join("{" + name + "}" for name in self.columns)
+        self.line_format = line_format or " ".join("{" + name + "}" for name in self.columns)
+        self.row_format = _positional_format(self.line_format, self.columns)
+        self.buffer = np.empty((capacity, len(self.columns)))
+        self.capacity = capacity
+        self.batch_size = max(1, min(BATCH_SIZE, capacity // 2))
+        self.flush_interval = flush_interval
+        # Записи, ещё не перенесённые в кольцевой буфер
+        self.pending = []
+        # Число записанных и сброшенных в файл записей с начала работы
+        self.head = 0
+        self.tail = 0
+        self.closed = False
+        self.flush_requested = False
+        self.error = None
+        self.condition = threading.Condition()
+
+        append = append and os.path.exists(file_path) and os.path.getsize(file_path) > 0
+        if self.format == "bin" and append:
+            with open(file_path, "rb") as f:
+                if _read_bin_header(f)[1] != self.columns:
+                    raise ValueError("Столбцы файла метрик не совпадают с записываемыми")
+        self.file = open(file_path, "ab" if append else "wb")
+        try:
+            if self.format == "bin" and not append:
+                names = "\n".join(self.columns).encode("UTF-8")
+                self.file.write(HEADER.pack(MAGIC, VERSION, len(self.columns), len(names)))
+                self.file.write(names)
+                self.file.write(bytes(_aligned(self.file.tell()) - self.file.tell()))
+            elif self.format == "csv" and not append:
+                self.file.write((",".join(self.columns) + "\n").encode("UTF-8"))
+        except BaseException:
+            self.file.close()
+            raise
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Добавление записи (из одного потока) без блокировки: записи переносятся в буфер порциями
+    def log(self, *values):
+        pending = self.pending
+        pending.append(values)
+        if len(pending) >= self.batch_size:
+            self.commit()
+
+    # Перенос накопленных записей в кольцевой буфер за один захват блокировки.
+    # Если места нет, ждёт, пока поток сбросит буфер в файл
+    def commit(self):
+        pending = self.pending
+        if not pending:
+            return
+        self.pending = []
+        with self.condition:
+            while self.head + len(pending) - self.tail > self.capacity and self.error is None:
+                self.condition.wait()
+            if self.error is not None:
+                raise self.error
+            first = self.head % self.capacity
+            size = min(len(pending), self.capacity - first)
+            self.buffer[first:first + size] = pending[:size]
+            if size < len(pending):
+                self.buffer[:len(pending) - size] = pending[size:]
+            self.head += len(pending)
+            if self.head - self.tail >= self.capacity // 2:
+                self.condition.notify_all()
+
+    # Фоновый поток: сброс записей, когда буфер заполнен наполовину,
+    # но не реже чем раз в flush_interval
+    def run(self):
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not self.closed and not self.flush_requested and self.head - self.tail < self.capacity // 2:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                start, stop = self.tail, self.head
+                if start == stop and self.closed:
+                    return
+            # Записи [start, stop) не перезаписываются, пока tail не сдвинут
+            try:
+                first = start % self.capacity
+                count = stop - start
+                while count:
+                    size = min(count, self.capacity - first)
+                    self.write(self.buffer[first:first + size])
+                    count -= size
+                    first = 0
+                self.file.flush()
+            except Exception as e:
+                with self.condition:
+                    self.error = e
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                self.tail = stop
+                self.condition.notify_all()
+
+    # Запись порции строк буфера. Числа текста и CSV - кратчайшая точная запись
+    def write(self, rows):
+        if self.format == "bin":
+            self.file.write(rows.tobytes())
+            return
+        row_format = self.row_format.format
+        iterations = rows[:, 0].astype(np.int64).tolist()
+        lines = [row_format(iteration, *row[1:]) for iteration, row in zip(iterations, rows.tolist())]
+        lines.append("")
+        self.file.write("\n".join(lines).encode("UTF-8"))
+
+    # Ожидание, пока все добавленные записи окажутся в файле
+    def flush(self):
+        self.commit()
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+            while self.tail < self.head and self.error is None:
+                self.condition.wait()
+            self.flush_requested = False
+            if self.error is not None:
+                raise self.error
+
+    # Сброс оставшихся записей и закрытие файла
+    def close(self):
+        # Ошибка фонового потока выбрасывается после закрытия файла
+        try:
+            self.commit()
+        except Exception:
+            pass
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Чтение журнала метрик: имя столбца -> массив. Двоичный файл не загружается,
+# столбцы - представления np.memmap (неполная последняя запись отбрасывается)
+def read_metrics(file_path):
+    file_format = metrics_format(file_path)
+    if file_format == "bin":
+        with open(file_path, "rb") as f:
+            offset, columns = _read_bin_header(f)
+        rows = (os.path.getsize(file_path) - offset) // (8 * len(columns))
+        if not rows:
+            return {name: np.empty(0) for name in columns}
+        data = np.memmap(file_path, dtype=np.float64, mode="r", offset=offset, shape=(rows, len(columns)))
+        return {name: data[:, k] for k, name in enumerate(columns)}
+    if file_format == "csv":
+        with open(file_path, "r", encoding="UTF-8") as f:
+            columns = f.readline().strip().split(",")
+            data = np.loadtxt(f, delimiter=",", ndmin=2).reshape(-1, len(columns))
+        return {name: data[:, k] for k, name in enumerate(columns)}
+
+    # Текст: первые два числа строки - номер итерации и ошибка
+    iterations = []
+    errors = []
+    with open(file_path, "r", encoding="UTF-8") as f:
+        for line in f:
+            numbers = _line_numbers(line)
+            if len(numbers) >= 2:
+                iterations.append(numbers[0])
+                errors.append(numbers[1])
+    return {"iteration": np.array(iterations), "error": np.array(errors)}
@@ -0,0 +1,123 @@
+# Прямое распространение в полносвязной сети с сигмоидной активацией
+# на матрицах NumPy: пакет из N входных векторов проходит каждый слой
+# за одно матричное умножение
+import queue
+import threading
+from itertools import islice
+
+import numpy as np
+
+from .column_io import CHUNK_SIZE, parse_csv_rows
+from .pipeline import get_until_stopped, put_until_stopped
+
+# Число порций в очереди между стадиями потоковой обработки
+QUEUE_DEPTH = 2
+
+LENGTH_MISMATCH = "Длина входного вектора не совпадает с матрицей весов"
+
+
+class Network:
+    # layers - матрицы весов слоёв формы (нейроны, входы), как в файлах nntask4;
+    # c - наклон сигмоиды. Веса хранятся транспонированными, чтобы пакет
+    # умножался справа без копирования
+    def __init__(self, layers, c=1, dtype=np.float64):
+        self.c = c
+        self.dtype = np.dtype(dtype)
+        self.weights = []
+        for layer in layers:
+            try:
+                matrix = np.asarray(layer, dtype=self.dtype)
+            except ValueError as e:
+                raise ValueError(f"Матрица весов слоя должна быть прямоугольной: {e}")
+            if matrix.ndim != 2:
+                raise ValueError("Матрица весов слоя должна быть прямоугольной")
+            if self.weights and self.weights[-1].shape[1] != matrix.shape[1]:
+                raise ValueError(LENGTH_MISMATCH)
+            self.weights.append(np.ascontiguousarray(matrix.T))
+
+    @property
+    def input_size(self):
+        return self.weights[0].shape[0]
+
+    @property
+    def output_size(self):
+        return self.weights[-1].shape[1]
+
+    # Выход сети для матрицы входов N x d (результат N x k) или для одного вектора
+    def forward(self, inputs):
+        activations = np.asarray(inputs, dtype=self.dtype)
+        single = activations.ndim == 1
+        if single:
+            activations = activations[np.newaxis, :]
+        for matrix in self.weights:
+            if activations.shape[1] != matrix.shape[0]:
+                raise ValueError(LENGTH_MISMATCH)
+            z = activations @ matrix
+            # Сигмоида на месте: 1 / (1 + exp(-c * z)); переполнение exp даёт 0
+            np.multiply(z, -self.c, out=z)
+            with np.errstate(over="ignore"):
+                np.exp(z, out=z)
+            z += 1
+            activations = np.reciprocal(z, out=z)
+        return activations[0] if single else activations
+
+
+# Потоковое вычисление выходов сети для файла векторов (по одному в строке через запятую).
+# Чтение, вычисление и запись выполняются одновременно: чтение и запись - в отдельных
+# потоках, между стадиями не более QUEUE_DEPTH порций по chunk_size строк,
+# поэтому объём памяти не зависит от размера файла. Возвращает число векторов
+def forward_file(network, input_path, output_path, chunk_size=CHUNK_SIZE):
+    width = network.input_size
+    inputs = queue.Queue(QUEUE_DEPTH)
+    outputs = queue.Queue(QUEUE_DEPTH)
+    stop = threading.Event()
+    failures = []
+
+    def run(stage):
+        try:
+            stage()
+        except BaseException as e:
+            failures.append(e)
+            stop.set()
+
+    def read():
+        with open(input_path, "r") as f:
+            while True:
+                lines = [line for line in islice(f, chunk_size) if line.strip()]
+                if not lines:
+                    break
+                if not put_until_stopped(inputs, parse_csv_rows(lines, width, LENGTH_MISMATCH), stop):
+                    return
+        put_until_stopped(inputs, None, stop)
+
+    def write():
+        with open(output_path, "w") as f:
+            while True:
+                block = get_until_stopped(outputs, stop)
+                if block is None:
+                    return
+                f.write("".join(", ".join(map(str, row)) + "\n" for row in block.tolist()))
+
+    threads = [threading.Thread(target=run, args=(read,), daemon=True),
+               threading.Thread(target=run, args=(write,), daemon=True)]
+    for thread in threads:
+        thread.start()
+    rows = 0
+    try:
+        while True:
+            block = get_until_stopped(inputs, stop)
+            if block is None:
+                break
+            rows += len(block)
+            if not put_until_stopped(outputs, network.forward(block), stop):
+                break
+        put_until_stopped(outputs, None, stop)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+    if failures:
+        raise failures[0]
+    return rows
@@ -0,0 +1,70 @@
+# Двоичный формат сети, общий для nntask4 и nntask5.
+# Заголовок: сигнатура, версия, тип элементов, функция активации, наклон c,
+# число слоёв и формы матриц (входы, выходы). Затем матрицы подряд, каждая
+# выровнена по 64 байтам, чтобы их можно было отобразить в память без копирования
+import struct
+
+import numpy as np
+
+MAGIC = b"NNWB"
+VERSION = 1
+# Сигнатура, версия, тип элементов (np.dtype.str), активация, c, число слоёв
+HEADER = struct.Struct("<4sI8s16sdQ")
+SHAPE = struct.Struct("<QQ")
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# Проверка сигнатуры двоичного формата
+def is_binary_network(file_path):
+    with open(file_path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# Запись матриц слоёв формы (входы, выходы) в двоичном формате
+def write_network_binary(file_path, matrices, c=1, activation="sigmoid", dtype=np.float64):
+    dtype = np.dtype(dtype)
+    with open(file_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, dtype.str.encode("ascii"), activation.encode("ascii"),
+                            c, len(matrices)))
+        for matrix in matrices:
+            f.write(SHAPE.pack(*np.shape(matrix)))
+        for matrix in matrices:
+            f.write(bytes(_aligned(f.tell()) - f.tell()))
+            f.write(np.ascontiguousarray(matrix, dtype=dtype).tobytes())
+
+
+# Чтение сети в двоичном формате. Матрицы (входы, выходы) - представления
+# np.memmap над файлом без копирования. mode="c" даёт изменяемые матрицы
+# (копирование при записи), изменения не попадают в файл.
+# Возвращает матрицы, наклон c и имя функции активации
+def read_network_binary(file_path, mode="r"):
+    with open(file_path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError("Файл сети повреждён: неполный заголовок")
+        magic, version, dtype, activation, c, count = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Неизвестный формат файла сети")
+        shapes = []
+        for _ in range(count):
+            shape = f.read(SHAPE.size)
+            if len(shape) != SHAPE.size:
+                raise ValueError("Файл сети повреждён: неполный заголовок")
+            shapes.append(SHAPE.unpack(shape))
+        offset = f.tell()
+
+    dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+    matrices = []
+    for shape in shapes:
+        offset = _aligned(offset)
+        if shape[0] * shape[1]:
+            matrices.append(np.memmap(file_path, dtype=dtype, mode=mode, offset=offset, shape=shape))
+        else:
+            # Пустую область отобразить нельзя
+            matrices.append(np.zeros(shape, dtype=dtype))
+        offset += dtype.itemsize * shape[0] * shape[1]
+    return matrices, c, activation.rstrip(b"\0").decode("ascii")
@@ -0,0 +1,191 @@
+# Реестр операций вершин-функций. У каждой операции есть скалярная реализация
+# (список чисел -> число) и пакетная (список столбцов, выходной массив -> массив),
+# а также допустимое число аргументов
+import importlib.util
+import math
+
+import numpy as np
+
+# Число отрезков строк, перечисляемых в тексте ошибки RowErrors
+ROW_RANGES_SHOWN = 5
+
+
+# Ошибка вычисления в части строк пакета: значения остальных строк получены,
+# в строках с ошибкой записано NaN. ranges - упорядоченные отрезки [начало, конец)
+# номеров строк (с 0), error - первая из ошибок, values - значения пакета
+class RowErrors(Exception):
+    def __init__(self, error, ranges, values=None):
+        super().__init__(error, ranges)
+        self.error = error
+        self.ranges = ranges
+        self.values = values
+
+    def __str__(self):
+        shown = ", ".join(str(start + 1) if stop - start == 1 else f"{start + 1}-{stop}"
+                          for start, stop in self.ranges[:ROW_RANGES_SHOWN])
+        more = ", ..." if len(self.ranges) > ROW_RANGES_SHOWN else ""
+        return f"{self.error} (строки {shown}{more})"
+
+    # Те же ошибки с номерами строк, сдвинутыми на offset
+    def shifted(self, offset):
+        return RowErrors(self.error, [(start + offset, stop + offset) for start, stop in self.ranges])
+
+    # Объединение с ошибками other: первая ошибка сохраняется, отрезки сливаются
+    def merged(self, other):
+        ranges = []
+        for start, stop in sorted(self.ranges + other.ranges):
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], stop))
+            else:
+                ranges.append((start, stop))
+        return RowErrors(self.error, ranges)
+
+
+class Operator:
+    def __init__(self, name, scalar, batch=None, min_args=1, max_args=None):
+        self.name = name
+        self.scalar = scalar
+        self.batch = batch if batch is not None else self.batch_from_scalar
+        self.min_args = min_args
+        self.max_args = max_args
+
+    # Проверка числа аргументов при компиляции
+    def check_arity(self, count):
+        if self.min_args == self.max_args == 1 and count != 1:
+            raise ValueError(f"Функция {self.name} должна принимать только один аргумент.")
+        if self.max_args is not None and self.min_args == self.max_args and count != self.max_args:
+            raise ValueError(f"Функция {self.name} должна принимать {self.max_args} аргумента.")
+        if count < self.min_args:
+            raise ValueError(f"Функция {self.name} должна принимать не менее {self.min_args} аргументов.")
+        if self.max_args is not None and count > self.max_args:
+            raise ValueError(f"Функция {self.name} должна принимать не более {self.max_args} аргументов.")
+
+    # Пакетное вычисление для операций без пакетной реализации: поэлементный вызов.
+    # Строка, на которой операция выбросила исключение, получает NaN, остальные
+    # вычисляются; их номера передаются в RowErrors. Ошибка во всех строках
+    # выбрасывается как есть
+    def batch_from_scalar(self, args, out):
+        columns = np.broadcast_arrays(out, *args)[1:]
+        failed = []
+        error = None
+        for k in range(len(out)):
+            try:
+                out[k] = self.scalar([column[k] for column in columns])
+            except Exception as e:
+                out[k] = np.nan
+                if error is None:
+                    error = e
+                if failed and failed[-1][1] == k:
+                    failed[-1] = (failed[-1][0], k + 1)
+                else:
+                    failed.append((k, k + 1))
+        if failed == [(0, len(out))]:
+            raise error
+        if failed:
+            raise RowErrors(error, failed, out)
+        return out
+
+
+# Операция, которую нельзя выполнить (неизвестная или с неверным числом аргументов).
+# Ошибка выдаётся при вычислении, после ошибок аргументов
+class FailingOperator(Operator):
+    def __init__(self, name, error):
+        super().__init__(name, self.fail, self.fail, 0)
+        self.error = error
+
+    def fail(self, *args):
+        raise self.error
+
+
+OPERATORS = {}
+
+
+# Регистрация операции. Пакетная реализация необязательна
+def register_operator(name, scalar, batch=None, min_args=1, max_args=None):
+    OPERATORS[name] = Operator(name, scalar, batch, min_args, max_args)
+    return OPERATORS[name]
+
+
+# Операция для вершины с count аргументами. Ошибки не выбрасываются сразу,
+# а откладываются до вычисления вершины
+def resolve_operator(name, count):
+    operator = OPERATORS.get(name)
+    if operator is None:
+        return FailingOperator(name, ValueError(f"Неизвестная операция: {name}"))
+    try:
+        operator.check_arity(count)
+    except ValueError as e:
+        return FailingOperator(name, e)
+    return operator
+
+
+# Загрузка пользовательских операций из файла Python, вызывающего register_operator
+def load_operator_plugins(file_path):
+    spec = importlib.util.spec_from_file_location("nnlib_operator_plugins", file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _product(args):
+    result = 1
+    for arg in args:
+        result *= arg
+    return result
+
+
+def _sigmoid(x):
+    # Устойчивая к переполнению запись
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    e = math.exp(x)
+    return e / (1.0 + e)
+
+
+# Пакетные реализации: аргументы сворачиваются в выходной массив без промежуточных копий
+def _reduce_batch(ufunc, initial):
+    def batch(args, out):
+        out.fill(initial)
+        for arg in args:
+            ufunc(out, arg, out=out)
+        return out
+    return batch
+
+
+def _chain_batch(ufunc):
+    def batch(args, out):
+        np.copyto(out, args[0])
+        for arg in args[1:]:
+            ufunc(out, arg, out=out)
+        return out
+    return batch
+
+
+def _unary_batch(ufunc):
+    def batch(args, out):
+        return ufunc(args[0], out=out)
+    return batch
+
+
+def _sigmoid_batch(args, out):
+    np.negative(args[0], out=out)
+    # Переполнение exp даёт inf, и результат корректно обращается в 0
+    with np.errstate(over="ignore"):
+        np.exp(out, out=out)
+    out += 1
+    return np.reciprocal(out, out=out)
+
+
+def _pow_batch(args, out):
+    return np.power(args[0], args[1], out=out)
+
+
+register_operator('+', sum, _reduce_batch(np.add, 0))
+register_operator('*', _product, _reduce_batch(np.multiply, 1))
+register_operator('exp', lambda args: math.exp(args[0]), _unary_batch(np.exp), 1, 1)
+register_operator('log', lambda args: math.log(args[0]), _unary_batch(np.log), 1, 1)
+register_operator('tanh', lambda args: math.tanh(args[0]), _unary_batch(np.tanh), 1, 1)
+register_operator('sigmoid', lambda args: _sigmoid(args[0]), _sigmoid_batch, 1, 1)
+register_operator('max', max, _chain_batch(np.maximum))
+register_operator('min', min, _chain_batch(np.minimum))
+register_operator('pow', lambda args: math.pow(args[0], args[1]), _pow_batch, 2, 2)
@@ -0,0 +1,315 @@
+# Градиентные методы обучения в виде объектов с общим интерфейсом step(params, grads).
+# params - список массивов параметров (слои сети или 0-мерный массив для скалярной
+# задачи), grads - направления уменьшения ошибки той же формы, в знаке обновления
+# обратного распространения: для SGD параметры += learning_rate * grads.
+# Обновления выполняются на месте через out=, состояние метода (только нужные
+# ему буферы) выделяется один раз при первом шаге
+import numpy as np
+
+
+class Optimizer:
+    # Число первых буферов create_state, которые переходят между шагами
+    # (остальные - рабочие) и имена числовых счётчиков метода.
+    # Они сохраняются в контрольной точке обучения
+    persistent = 0
+    counters = ()
+
+    def __init__(self, learning_rate):
+        self.learning_rate = learning_rate
+        self.state = None
+
+    # Буферы метода для одного массива параметров
+    def create_state(self, param):
+        return (np.zeros_like(param, dtype=float),)
+
+    def ensure_state(self, params):
+        if self.state is None:
+            self.state = [self.create_state(param) for param in params]
+
+    # Переходящие буферы по порядку параметров (пусто до первого шага)
+    def state_arrays(self):
+        return [buffer for state in self.state or () for buffer in state[:self.persistent]]
+
+    def counter_values(self):
+        return {name: getattr(self, name) for name in self.counters}
+
+    # Восстановление состояния из state_arrays() и counter_values()
+    def restore_state(self, params, arrays, counters):
+        if arrays:
+            self.ensure_state(params)
+            buffers = [buffer for state in self.state for buffer in state[:self.persistent]]
+            if len(buffers) != len(arrays):
+                raise ValueError("Состояние метода обучения не соответствует сети")
+            for buffer, array in zip(buffers, arrays):
+                np.copyto(buffer, array)
+        for name, value in counters.items():
+            setattr(self, name, value)
+
+    def step(self, params, grads):
+        self.ensure_state(params)
+        for param, grad, state in zip(params, grads, self.state):
+            self.update(param, grad, *state)
+
+    def update(self, param, grad, *state):
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    def update(self, param, grad, scratch):
+        np.multiply(grad, self.learning_rate, out=scratch)
+        param += scratch
+
+
+class Momentum(Optimizer):
+    persistent = 1
+
+    def __init__(self, learning_rate, rho=0.9):
+        super().__init__(learning_rate)
+        self.rho = rho
+
+    def create_state(self, param):
+        return np.zeros_like(param, dtype=float), np.empty_like(param, dtype=float)
+
+    def update(self, param, grad, velocity, scratch):
+        velocity *= self.rho
+        np.multiply(grad, self.learning_rate, out=scratch)
+        velocity += scratch
+        param += velocity
+
+
+# Ускоренный градиент Нестерова в записи через градиент в текущей точке:
+# скорость v = rho * v + lr * g, шаг rho * v + lr * g. Эквивалентно вычислению
+# градиента в точке предпросмотра, но не требует второго прохода.
+# lookahead=True - исходная запись: grads вычисляются вызывающим в точке
+# lookahead_point(params), затем шаг как у Momentum
+class NAG(Momentum):
+    def __init__(self, learning_rate, rho=0.9, lookahead=False):
+        super().__init__(learning_rate, rho)
+        self.lookahead = lookahead
+
+    # Точка предпросмотра params + rho * v в массивы out
+    def lookahead_point(self, params, out):
+        self.ensure_state(params)
+        for param, point, (velocity, _) in zip(params, out, self.state):
+            np.multiply(velocity, self.rho, out=point)
+            point += param
+
+    def update(self, param, grad, velocity, scratch):
+        if self.lookahead:
+            return super().update(param, grad, velocity, scratch)
+        velocity *= self.rho
+        np.multiply(grad, self.learning_rate, out=scratch)
+        velocity += scratch
+        param += scratch
+        np.multiply(velocity, self.rho, out=scratch)
+        param += scratch
+
+
+# Шаг по знаку градиента, нормированному на его величину
+class QuickProp(Optimizer):
+    def __init__(self, learning_rate, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.epsilon = epsilon
+
+    def update(self, param, grad, scratch):
+        np.abs(grad, out=scratch)
+        scratch += self.epsilon
+        np.divide(grad, scratch, out=scratch)
+        scratch *= self.learning_rate
+        param += scratch
+
+
+# Шаг каждого веса растёт, пока знак градиента сохраняется, и уменьшается при смене знака.
+# two_way=True - правило исходной скалярной версии: шаг уменьшается всегда, когда
+# знак не сохранился (в том числе при нулевом градиенте), а нулевое направление
+# считается положительным
+class RProp(Optimizer):
+    persistent = 2
+
+    def __init__(self, learning_rate, initial_step=0.1, increase=1.2, decrease=0.5, two_way=False):
+        super().__init__(learning_rate)
+        self.initial_step = initial_step
+        self.increase = increase
+        self.decrease = decrease
+        self.two_way = two_way
+
+    def create_state(self, param):
+        return (np.zeros_like(param, dtype=float), np.full_like(param, self.initial_step, dtype=float),
+                np.empty_like(param, dtype=float), np.empty_like(param, dtype=bool))
+
+    def update(self, param, grad, previous, step, scratch, mask):
+        np.multiply(previous, grad, out=scratch)
+        np.greater(scratch, 0, out=mask)
+        np.multiply(step, self.increase, out=step, where=mask)
+        if self.two_way:
+            np.logical_not(mask, out=mask)
+        else:
+            np.less(scratch, 0, out=mask)
+        np.multiply(step, self.decrease, out=step, where=mask)
+        np.copyto(previous, grad)
+        if self.two_way:
+            np.greater_equal(grad, 0, out=mask)
+            np.multiply(mask, 2.0, out=scratch)
+            scratch -= 1
+        else:
+            np.sign(grad, out=scratch)
+        scratch *= step
+        param += scratch
+
+
+class AdaGrad(Optimizer):
+    persistent = 1
+
+    def __init__(self, learning_rate, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.epsilon = epsilon
+
+    def create_state(self, param):
+        return np.zeros_like(param, dtype=float), np.empty_like(param, dtype=float)
+
+    def update(self, param, grad, cache, scratch):
+        np.square(grad, out=scratch)
+        cache += scratch
+        np.sqrt(cache, out=scratch)
+        scratch += self.epsilon
+        np.divide(grad, scratch, out=scratch)
+        scratch *= self.learning_rate
+        param += scratch
+
+
+# Скорость обучения не используется: шаг определяется отношением
+# накопленных квадратов обновлений и градиентов.
+# epsilon_outside=True - (sqrt(u) + eps) / (sqrt(c) + eps), как в исходной
+# скалярной версии, иначе sqrt(u + eps) / sqrt(c + eps)
+class AdaDelta(Optimizer):
+    persistent = 2
+
+    def __init__(self, learning_rate, rho=0.9, epsilon=1e-8, epsilon_outside=False):
+        super().__init__(learning_rate)
+        self.rho = rho
+        self.epsilon = epsilon
+        self.epsilon_outside = epsilon_outside
+
+    def create_state(self, param):
+        return (np.zeros_like(param, dtype=float), np.zeros_like(param, dtype=float),
+                np.empty_like(param, dtype=float), np.empty_like(param, dtype=float))
+
+    def update(self, param, grad, cache, updates, scratch, delta):
+        rho, epsilon = self.rho, self.epsilon
+        np.square(grad, out=scratch)
+        scratch *= 1 - rho
+        cache *= rho
+        cache += scratch
+        if self.epsilon_outside:
+            np.sqrt(updates, out=delta)
+            delta += epsilon
+            np.sqrt(cache, out=scratch)
+            scratch += epsilon
+            delta /= scratch
+            delta *= grad
+        else:
+            np.add(updates, epsilon, out=delta)
+            np.sqrt(delta, out=delta)
+            delta *= grad
+            np.add(cache, epsilon, out=scratch)
+            np.sqrt(scratch, out=scratch)
+            delta /= scratch
+        np.square(delta, out=scratch)
+        scratch *= 1 - rho
+        updates *= rho
+        updates += scratch
+        param += delta
+
+
+# Номер шага для поправки смещения моментов считается по вызовам step
+class Adam(Optimizer):
+    persistent = 2
+    counters = ("t",)
+
+    def __init__(self, learning_rate, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.t = 0
+
+    def create_state(self, param):
+        return (np.zeros_like(param, dtype=float), np.zeros_like(param, dtype=float),
+                np.empty_like(param, dtype=float), np.empty_like(param, dtype=float))
+
+    def step(self, params, grads):
+        self.t += 1
+        super().step(params, grads)
+
+    def update(self, param, grad, m, v, scratch, denominator):
+        beta1, beta2 = self.beta1, self.beta2
+        m *= beta1
+        np.multiply(grad, 1 - beta1, out=scratch)
+        m += scratch
+        v *= beta2
+        np.square(grad, out=scratch)
+        scratch *= 1 - beta2
+        v += scratch
+        # lr * m_hat / (sqrt(v_hat) + eps)
+        np.divide(v, 1 - beta2 ** self.t, out=denominator)
+        np.sqrt(denominator, out=denominator)
+        denominator += self.epsilon
+        np.divide(m, 1 - beta1 ** self.t, out=scratch)
+        scratch *= self.learning_rate
+        scratch /= denominator
+        param += scratch
+
+
+# Нелинейные сопряжённые градиенты с постоянным шагом learning_rate.
+# Направление строится по всему вектору параметров, а не по каждому слою.
+# beta Полака-Рибьер ограничена отрезком [0, beta Флетчера-Ривса]; при beta >= 1
+# направление сбрасывается на градиент, иначе на шумных градиентах отдельных
+# образцов оно неограниченно растёт
+class ConjugateGradient(Optimizer):
+    persistent = 2
+
+    def create_state(self, param):
+        return np.zeros_like(param, dtype=float), np.zeros_like(param, dtype=float), np.empty_like(param, dtype=float)
+
+    def step(self, params, grads):
+        self.ensure_state(params)
+        previous_norm = 0.0
+        overlap = 0.0
+        norm = 0.0
+        for grad, (previous, _, _) in zip(grads, self.state):
+            previous_norm += np.vdot(previous, previous)
+            overlap += np.vdot(grad, previous)
+            norm += np.vdot(grad, grad)
+        beta = 0.0
+        if previous_norm > 0:
+            beta = max(0.0, min(norm - overlap, norm) / previous_norm)
+            if beta >= 1:
+                beta = 0.0
+
+        for param, grad, (previous, direction, scratch) in zip(params, grads, self.state):
+            direction *= beta
+            direction += grad
+            np.multiply(direction, self.learning_rate, out=scratch)
+            param += scratch
+            np.copyto(previous, grad)
+
+
+OPTIMIZERS = {
+    "SGD": SGD,
+    "Momentum": Momentum,
+    "QuickProp": QuickProp,
+    "RProp": RProp,
+    "ConjugateGradient": ConjugateGradient,
+    "NAG": NAG,
+    "AdaGrad": AdaGrad,
+    "AdaDelta": AdaDelta,
+    "Adam": Adam,
+}
+
+
+# Метод обучения по имени. options - параметры конструктора метода
+def make_optimizer(method, learning_rate, **options):
+    optimizer = OPTIMIZERS.get(method)
+    if optimizer is None:
+        raise ValueError(f"Неизвестный метод: {method}")
+    return optimizer(learning_rate, **options)
@@ -0,0 +1,24 @@
+# Очереди между потоками конвейерной обработки. Ожидание прерывается,
+# если какая-либо стадия остановилась (установлено событие stop)
+import queue
+
+
+# Передача элемента в очередь. False - конвейер остановлен
+def put_until_stopped(stage_queue, item, stop):
+    while not stop.is_set():
+        try:
+            stage_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+# Получение элемента из очереди; None - конвейер остановлен
+def get_until_stopped(stage_queue, stop):
+    while not stop.is_set():
+        try:
+            return stage_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
@@ -0,0 +1,123 @@
+# Построение префиксной записи функции по графу без рекурсии
+from array import array
+
+from .toposort import topological_order
+
+# Число частей записи, накапливаемых перед записью в файл
+WRITE_BATCH = 4096
+
+
+# Префиксная запись для вершины start по частям: вершина, затем в скобках
+# её аргументы в порядке номеров входящих дуг. Глубина обхода ограничена
+# только памятью под явный стек. Вершины, отмеченные в shared, не раскрываются
+# (кроме самой start), вместо них выводится только имя
+def iter_prefix_function(graph, start, shared=None):
+    names = graph.names
+    in_ptr = graph.in_ptr
+    in_src = graph.in_src
+
+    yield names[start]
+    lo, hi = in_ptr[start], in_ptr[start + 1]
+    if lo == hi:
+        return
+    yield "("
+    # Кадр стека: [следующая дуга, первая дуга, конец дуг]
+    stack = [[lo, lo, hi]]
+    while stack:
+        frame = stack[-1]
+        pos = frame[0]
+        if pos == frame[2]:
+            stack.pop()
+            yield ")"
+            continue
+        frame[0] = pos + 1
+        if pos > frame[1]:
+            yield ", "
+
+        v = in_src[pos]
+        yield names[v]
+        if shared is not None and shared[v]:
+            continue
+        lo, hi = in_ptr[v], in_ptr[v + 1]
+        if lo != hi:
+            yield "("
+            stack.append([lo, lo, hi])
+
+
+def build_prefix_function(graph, start):
+    return "".join(iter_prefix_function(graph, start))
+
+
+# Префиксная запись для всех вершин без исходящих дуг
+def generate_prefix_functions(graph, root_vertices):
+    return [build_prefix_function(graph, root) for root in root_vertices]
+
+
+# Запись частей в файл порциями, без построения всей строки в памяти
+def write_parts(parts, file):
+    batch = []
+    for part in parts:
+        batch.append(part)
+        if len(batch) >= WRITE_BATCH:
+            file.write("".join(batch))
+            batch.clear()
+    file.write("".join(batch))
+
+
+# Потоковая запись префиксных записей в файл, по одной на строку
+def write_prefix_functions(graph, root_vertices, file):
+    for root in root_vertices:
+        write_parts(iter_prefix_function(graph, root), file)
+        file.write("\n")
+
+
+# Общие подвыражения: вершины-функции, на которые ссылаются больше одного раза
+# при раскрытии записи от root_vertices
+def find_shared_vertices(graph, root_vertices):
+    in_ptr = graph.in_ptr
+    in_src = graph.in_src
+    references = array("q", bytes(8 * graph.vertex_count))
+
+    # Обход от корней против направления дуг: учитываются только достижимые вершины
+    reached = bytearray(graph.vertex_count)
+    stack = []
+    for root in root_vertices:
+        if not reached[root]:
+            reached[root] = 1
+            stack.append(root)
+    while stack:
+        v = stack.pop()
+        for j in range(in_ptr[v], in_ptr[v + 1]):
+            u = in_src[j]
+            references[u] += 1
+            if not reached[u]:
+                reached[u] = 1
+                stack.append(u)
+
+    shared = bytearray(graph.vertex_count)
+    for v in range(graph.vertex_count):
+        if references[v] > 1 and in_ptr[v + 1] > in_ptr[v]:
+            shared[v] = 1
+    return shared
+
+
+# Запись с общими подвыражениями: каждая общая вершина раскрывается один раз
+# в строке "let v = v(...)" до первого использования, далее на неё ссылаются
+# по имени. Размер вывода линеен по размеру графа, а не экспоненциален
+def write_shared_prefix_functions(graph, root_vertices, file, order=None):
+    if order is None:
+        order, _ = topological_order(graph)
+    shared = find_shared_vertices(graph, root_vertices)
+    names = graph.names
+
+    for v in order:
+        if shared[v]:
+            file.write(f"let {names[v]} = ")
+            write_parts(iter_prefix_function(graph, v, shared), file)
+            file.write("\n")
+    for root in root_vertices:
+        if shared[root]:
+            file.write(names[root])
+        else:
+            write_parts(iter_prefix_function(graph, root, shared), file)
+        file.write("\n")
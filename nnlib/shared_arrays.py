@@ -0,0 +1,50 @@
+# Передача массивов NumPy процессам пула через общую память вместо
+# копирования при сериализации аргументов каждой задачи
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Выравнивание массивов в блоке общей памяти
+ALIGNMENT = 64
+
+
+# Размещение массивов в одном блоке общей памяти. Возвращает блок
+# (его нужно закрыть и освободить через unlink) и описание для attach_arrays
+def share_arrays(arrays):
+    layout = []
+    size = 0
+    for array in arrays:
+        array = np.asarray(array)
+        size = (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        layout.append((array.shape, array.dtype.str, size))
+        size += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for array, view in zip(arrays, _views(block, layout)):
+        view[...] = array
+    return block, (block.name, layout)
+
+
+def _views(block, layout):
+    return [np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset) for shape, dtype, offset in layout]
+
+
+# Блоки, подключённые в этом процессе: представления ссылаются на их память,
+# поэтому блоки остаются открытыми до завершения процесса
+_attached = {}
+
+
+# Подключение к блоку в другом процессе. Массивы с номерами из copy копируются
+# (их можно изменять), остальные - представления общей памяти только для чтения
+def attach_arrays(description, copy=()):
+    name, layout = description
+    block = _attached.get(name)
+    if block is None:
+        block = _attached[name] = shared_memory.SharedMemory(name=name)
+    arrays = []
+    for index, view in enumerate(_views(block, layout)):
+        if index in copy:
+            view = view.copy()
+        else:
+            view.flags.writeable = False
+        arrays.append(view)
+    return arrays
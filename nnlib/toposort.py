@@ -0,0 +1,61 @@
+# Топологическая сортировка и поиск цикла без рекурсии, за O(V + E)
+from array import array
+
+from .graph_store import INDEX_TYPE, OFFSET_TYPE
+
+
+# Алгоритм Кана. Возвращает номера вершин от истоков к стокам и цикл
+# (список вершин v0, v1, ..., v0 по направлению дуг) или None, если цикла нет.
+# При наличии цикла порядок содержит только вершины, не зависящие от него
+def topological_order(graph):
+    in_ptr = graph.in_ptr
+    out_ptr = graph.out_ptr
+    out_dst = graph.out_dst
+    count = graph.vertex_count
+
+    indegree = array(OFFSET_TYPE, (in_ptr[v + 1] - in_ptr[v] for v in range(count)))
+    # Массив порядка одновременно служит очередью вершин с нулевой степенью захода
+    order = array(INDEX_TYPE, (v for v in range(count) if indegree[v] == 0))
+    head = 0
+    while head < len(order):
+        v = order[head]
+        head += 1
+        for j in range(out_ptr[v], out_ptr[v + 1]):
+            u = out_dst[j]
+            indegree[u] -= 1
+            if indegree[u] == 0:
+                order.append(u)
+
+    if len(order) == count:
+        return order, None
+    return order, find_cycle(graph, indegree)
+
+
+# Поиск цикла среди вершин, не попавших в топологический порядок (indegree > 0).
+# У каждой такой вершины есть входящая дуга из такой же вершины, поэтому
+# движение назад по дугам обязательно замкнётся
+def find_cycle(graph, indegree):
+    in_ptr = graph.in_ptr
+    in_src = graph.in_src
+    v = next(v for v in range(graph.vertex_count) if indegree[v] > 0)
+
+    position = {}
+    path = []
+    while v not in position:
+        position[v] = len(path)
+        path.append(v)
+        for j in range(in_ptr[v], in_ptr[v + 1]):
+            if indegree[in_src[j]] > 0:
+                v = in_src[j]
+                break
+
+    # Путь построен против направления дуг
+    cycle = path[position[v]:]
+    cycle.reverse()
+    cycle.append(cycle[0])
+    return cycle
+
+
+# Текстовая запись цикла: "v1 -> v2 -> v1"
+def format_cycle(graph, cycle):
+    return " -> ".join(graph.names[v] for v in cycle)
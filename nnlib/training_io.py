@@ -0,0 +1,127 @@
+# Чтение сетей и обучающих выборок nntask5 без eval.
+# Сеть: по строке на слой - вложенный список "[[w11, w12], [w21, w22]]", или NPZ
+# с матрицами слоёв. Выборка: строки "[x1, x2] -> [y1, y2]", CSV с заголовком
+# (столбцы y* - целевые выходы, остальные - входы), NPZ с массивами x и y
+# или NPY со структурированным массивом с полями x и y (отображается в память).
+# NPZ load_samples загружает целиком; потоком его читает TrainingStream.
+# Числа разбираются сразу в массивы NumPy порциями строк
+from itertools import islice
+
+import numpy as np
+
+from .column_io import CHUNK_SIZE, parse_csv_rows
+
+
+# Матрица из записи вложенного списка "[[a, b], [c, d]]"
+def parse_matrix(text):
+    text = text.strip()
+    if not (text.startswith("[[") and text.endswith("]]")):
+        raise ValueError(f"Слой должен быть записан как список строк: {text[:40]}")
+    rows = [row.rstrip().rstrip(",") for row in text[1:-1].replace("]", "").split("[")[1:]]
+    return parse_csv_rows(rows, rows[0].count(",") + 1, "Матрица весов слоя должна быть прямоугольной")
+
+
+# Слои сети из текстового файла или NPZ (массивы в порядке arr_0, arr_1, ...)
+def load_layers(file_path):
+    if file_path.endswith(".npz"):
+        with np.load(file_path) as data:
+            names = sorted(data.files, key=lambda name: (len(name), name))
+            return [np.array(data[name], dtype=float) for name in names]
+    with open(file_path, "r") as file:
+        return [parse_matrix(line) for line in file if line.strip()]
+
+
+# Разбор строки выборки на записи входа и выхода без скобок
+def _split_sample(line):
+    x, arrow, y = line.partition("->")
+    x = x.strip()
+    y = y.strip()
+    if not arrow or not (x.startswith("[") and x.endswith("]") and y.startswith("[") and y.endswith("]")):
+        raise ValueError(f"Строка выборки должна иметь вид [x...] -> [y...]: {line.strip()[:40]}")
+    return x[1:-1], y[1:-1]
+
+
+def _count_lines(file_path):
+    count = 0
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count + 1
+
+
+# Порции выборки из текстового файла: пары матриц входов и выходов по chunk_size строк
+def iter_text_samples(file_path, chunk_size=CHUNK_SIZE):
+    input_size = target_size = None
+    with open(file_path, "r") as f:
+        while True:
+            lines = [line for line in islice(f, chunk_size) if line.strip()]
+            if not lines:
+                break
+            pairs = [_split_sample(line) for line in lines]
+            if input_size is None:
+                input_size = len(pairs[0][0].split(","))
+                target_size = len(pairs[0][1].split(","))
+            yield (parse_csv_rows([x for x, _ in pairs], input_size),
+                   parse_csv_rows([y for _, y in pairs], target_size))
+
+
+# Порции выборки из CSV с заголовком: столбцы y* - целевые выходы
+def iter_csv_samples(file_path, chunk_size=CHUNK_SIZE):
+    with open(file_path, "r") as f:
+        header = [name.strip() for name in f.readline().split(",")]
+        is_target = np.array([name.startswith("y") for name in header], dtype=bool)
+        while True:
+            lines = [line for line in islice(f, chunk_size) if line.strip()]
+            if not lines:
+                break
+            block = parse_csv_rows(lines, len(header))
+            yield block[:, ~is_target], block[:, is_target]
+
+
+# Выборка из текстового файла: матрицы входов и выходов выделяются заранее
+# по числу строк и заполняются порциями
+def _load_text_samples(file_path, chunk_size):
+    capacity = _count_lines(file_path)
+    inputs = targets = None
+    size = 0
+    for x, y in iter_text_samples(file_path, chunk_size):
+        if inputs is None:
+            inputs = np.empty((capacity, x.shape[1]))
+            targets = np.empty((capacity, y.shape[1]))
+        inputs[size:size + len(x)] = x
+        targets[size:size + len(y)] = y
+        size += len(x)
+    if inputs is None:
+        return np.empty((0, 0)), np.empty((0, 0))
+    return inputs[:size], targets[:size]
+
+
+def _load_csv_samples(file_path, chunk_size):
+    blocks = list(iter_csv_samples(file_path, chunk_size))
+    if not blocks:
+        return np.empty((0, 0)), np.empty((0, 0))
+    return np.concatenate([x for x, _ in blocks]), np.concatenate([y for _, y in blocks])
+
+
+# Обучающая выборка: матрицы входов и целевых выходов (образец - строка).
+# mmap=True для NPY: матрицы отображаются в память и читаются по мере обучения
+def load_samples(file_path, mmap=False, chunk_size=CHUNK_SIZE):
+    if file_path.endswith(".npy"):
+        data = np.load(file_path, mmap_mode="r" if mmap else None)
+        if data.dtype.names is None or "x" not in data.dtype.names or "y" not in data.dtype.names:
+            raise ValueError("NPY файл выборки должен содержать структурированный массив с полями x и y")
+        return data["x"], data["y"]
+    if file_path.endswith(".npz"):
+        with np.load(file_path) as data:
+            return np.array(data["x"], dtype=float), np.array(data["y"], dtype=float)
+    if file_path.endswith(".csv"):
+        return _load_csv_samples(file_path, chunk_size)
+    return _load_text_samples(file_path, chunk_size)
+
+
+# Сохранение выборки в NPY для последующей загрузки с отображением в память
+def save_samples_npy(file_path, inputs, targets):
+    data = np.empty(len(inputs), dtype=[("x", float, (inputs.shape[1],)), ("y", float, (targets.shape[1],))])
+    data["x"] = inputs
+    data["y"] = targets
+    np.save(file_path, data)
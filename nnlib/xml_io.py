@@ -0,0 +1,89 @@
+# Запись графа в XML без построения дерева документа и обратное чтение.
+# Формат совпадает с выводом minidom toprettyxml(indent="    ")
+import xml.etree.ElementTree as ET
+from array import array
+from xml.sax.saxutils import escape
+
+from .graph_parser import ORDER_TYPE, index_in_arcs, read_graph_file
+from .graph_store import INDEX_TYPE, CompactGraph
+from .prefix import write_parts
+
+XML_HEADER = '<?xml version="1.0" ?>\n'
+INDENT = "    "
+
+
+# Части XML документа: вершины в порядке имён, затем дуги в порядке записи
+def iter_graph_xml(graph):
+    yield XML_HEADER
+    if not graph.vertex_count:
+        yield "<graph/>\n"
+        return
+    yield "<graph>\n"
+    for name in graph.vertices():
+        yield f"{INDENT}<vertex>{escape(name)}</vertex>\n"
+    for v1, v2, n in graph.edges():
+        yield (f"{INDENT}<arc>\n"
+               f"{INDENT * 2}<from>{escape(v1)}</from>\n"
+               f"{INDENT * 2}<to>{escape(v2)}</to>\n"
+               f"{INDENT * 2}<order>{n}</order>\n"
+               f"{INDENT}</arc>\n")
+    yield "</graph>\n"
+
+
+# Потоковая запись графа в файл порциями
+def write_graph_xml(graph, file):
+    write_parts(iter_graph_xml(graph), file)
+
+
+# Чтение графа, записанного write_graph_xml (вывод nntask1). Граф в таком файле
+# уже проверен, поэтому записи вершин и номера дуг повторно не проверяются.
+# Документ разбирается потоково: обработанные элементы сразу удаляются из дерева.
+# Номера вершин назначаются в порядке появления в дугах, как при чтении текста
+def read_graph_xml_file(file_path):
+    declared = set()
+    names = []
+    index = {}
+    arc_src = array(INDEX_TYPE)
+    arc_dst = array(INDEX_TYPE)
+    arc_order = array(ORDER_TYPE)
+
+    def intern(vertex):
+        v = index.get(vertex)
+        if v is None:
+            if vertex not in declared:
+                raise Exception(f"Вершина {vertex} не объявлена в файле {file_path}")
+            v = index[vertex] = len(names)
+            names.append(vertex)
+        return v
+
+    events = ET.iterparse(file_path, events=("start", "end"))
+    _, root = next(events)
+    arc = {}
+    for event, elem in events:
+        if event == "start":
+            continue
+        tag = elem.tag
+        if tag == "vertex":
+            declared.add(elem.text)
+        elif tag == "arc":
+            arc_src.append(intern(arc["from"]))
+            arc_dst.append(intern(arc["to"]))
+            arc_order.append(int(arc["order"]))
+        else:
+            # Значения from, to, order запоминаются до конца элемента arc
+            arc[tag] = elem.text
+            continue
+        # Элемент разобран: освобождаем его и ссылку на него из корня
+        root.clear()
+
+    in_ptr, in_src, _, duplicate, bad_vertex = index_in_arcs(len(names), arc_src, arc_dst, arc_order)
+    if duplicate != -1 or bad_vertex != -1:
+        raise Exception(f"Нарушен порядок или повторяются дуги в файле {file_path}")
+    return CompactGraph(names, index, arc_src, arc_dst, arc_order, in_ptr, in_src)
+
+
+# Чтение графа из текстового файла или из XML файла nntask1 (по расширению .xml)
+def load_graph_file(file_path):
+    if file_path.endswith(".xml"):
+        return read_graph_xml_file(file_path)
+    return read_graph_file(file_path)
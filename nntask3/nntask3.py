@@ -1,230 +1,57 @@
 import argparse
-import math
-import re
-
-# Проверка корректности записи вершин
-def check_vertex(vertex):
-    # Вершина должна состоять из двух символов: 'v' и числа
-    if len(vertex) < 2 or vertex[0] != "v" or not vertex[1:].isdigit():
-        return False
-    return True
-
-# Чтение файла с графом
-def read_file(file_path):
-    with open(file_path, "r", encoding="UTF-8") as f:
-        data = f.readline()
-    return data
-
-# Чтение графа из файла серилизация
-def read_graph(data):
-    graph = []
-    vertices = set()
-    incoming_edges = {}
-    
-    if len(data) % 3 != 0:
-        raise Exception("Неправильный формат данных: количество элементов должно быть кратно 3")
-    
-    for i in range(0, len(data), 3):
-        tuple_ = data[i:i+3]
-        v1 = tuple_[0].strip()
-        v2 = tuple_[1].strip()
-        n = tuple_[2].strip()
-
-        if not check_vertex(v1) or not check_vertex(v2):
-            raise Exception(f"Неправильная запись векторов: {v1}, {v2}")
-        
-        if not n.isdigit():
-            raise Exception(f"'{n}' не является числом")
-        n = int(n)
-        if n <= 0:
-            raise Exception(f"Номер дуги должен быть положительным числом: {n}")
-        
-        vertices.add(v1)
-        vertices.add(v2)
-        if (v1, v2, n) not in graph:
-            graph.append((v1, v2, n))
-        else:
-            raise Exception(f"Ребро указано дважды: {(v1, v2, n)}")
-
-        if v2 not in incoming_edges:
-            incoming_edges[v2] = [n]
-        else:
-            incoming_edges[v2].append(n)
-
-    for v in incoming_edges:
-        max_el = max(incoming_edges[v])
-        if sorted(incoming_edges[v]) != list(range(1, max_el + 1)):
-            raise Exception(f"Порядок входящих дуг нарушен для вершины {v}: {incoming_edges[v]}")
-    
-    return sorted(list(vertices)), graph
-
-#
-def get_dict_graph(edges):
-    graph = {}
-    for v1, v2, num in edges:
-        if v2 in graph:
-            graph[v2].append((v1, num))
-        else:
-            graph[v2] = [(v1, num)]
-    return graph
-
-def find_stok(graph, vertices):
-    # Все вершины, которые являются началом хотя бы одной дуги
-    start_vertices = set()
-    for key in graph:
-        for i in range(len(graph[key])):
-            start_vertices.add(graph[key][i][0])
-
-    # Все вершины графа, включая начальные и конечные
-    all_vertices = set(vertices)
-    # Вершины, из которых не исходит ни одной дуги
-    no_outgoing_edges = all_vertices - start_vertices
-
-    return sorted(list(no_outgoing_edges))
-
-# Функция для построения графа из списка рёбер
-def build_graph(edges, vertices):
-    graph = {v:[] for v in vertices}
-    for v1, v2, _ in edges:
-        graph[v1].append(v2)
-    return graph
-
-# Рекурсивная функция DFS для поиска цикла
-def dfs_for_find_cycle(vertex, graph, visited, rec_stack):
-    visited.add(vertex)
-    rec_stack.add(vertex)
-
-    for neighbor in graph[vertex]:
-        if neighbor in rec_stack:
-            return True
-        elif neighbor not in visited:
-            if dfs_for_find_cycle(neighbor, graph, visited, rec_stack):
-                return True
-    
-    # Убираем вершину из стека рекурсивного вызова перед возвратом
-    rec_stack.remove(vertex)
-    return False
-
-def has_cycle(edges, vertices):
-    graph = build_graph(edges, vertices)
-    visited = set()
-    
-    for vertex in graph:
-        if vertex not in visited:
-            rec_stack = set()
-            if dfs_for_find_cycle(vertex, graph, visited, rec_stack):
-                return True
-    return False
-
-def build_prefix_function(graph, start):
-    if start not in graph:
-        return start 
-
-    sorted_edges = sorted(graph[start], key=lambda x: x[1])
-    inner_parts = [build_prefix_function(graph, v) for v, _ in sorted_edges]
-
-    return f"{start}({', '.join(inner_parts)})"
-
-def generate_prefix_functions(graph, root_vertices):
-    result = []
-    for root in root_vertices:
-        result.append(build_prefix_function(graph, root))
-    return result
-
-# Функция для выполнения операции
-def evaluate_operation(operation, args):
-    if operation == '+':
-        return sum(args)
-    elif operation == '*':
-        result = 1
-        for arg in args:
-            result *= arg
-        return result
-    elif operation == 'exp':
-        if len(args) != 1:
-            raise ValueError("Функция exp должна принимать только один аргумент.")
-        return math.exp(args[0])
-    else:
-        raise ValueError(f"Неизвестная операция: {operation}")
-
-
-# Функция для подстановки значений из словаря и вычисления выражения
-def substitute_values(expression, operations):
-    # Рекурсивная функция для разбора и вычисления
-    def recursive_evaluate(expr):
-        expr = expr.strip()
-
-        # Если это просто вершина, возвращаем значение из словаря
-        if expr in operations:
-            value = operations[expr]
-            if isinstance(value, str):  # Если это функция, а не константа
-                raise ValueError(f"{expr} должно быть функцией, но является константой.")
-            return value, str(value)
-
-        # Ищем функцию с аргументами
-        match = re.match(r'([a-zA-Z0-9_]+)\((.*)\)', expr)
-        if match:
-            node = match.group(1)
-            if node not in operations:
-                raise ValueError(f"Неизвестная вершина {node} в выражении.")
-
-            operation = operations[node]
-            if isinstance(operation, (int, float)):
-                raise ValueError(f"{node} должно быть функцией, но является константой.")
-
-            # Разбираем аргументы функции, учитывая вложенность
-            args_str = match.group(2)
-            args = []
-            bracket_level = 0
-            current_arg = []
-
-            for char in args_str:
-                if char == ',' and bracket_level == 0:
-                    args.append(''.join(current_arg).strip())
-                    current_arg = []
-                else:
-                    if char == '(':
-                        bracket_level += 1
-                    elif char == ')':
-                        bracket_level -= 1
-                    current_arg.append(char)
-            args.append(''.join(current_arg).strip())
-
-            # Рекурсивно вычисляем каждый аргумент
-            evaluated_args = []
-            substituted_args = []
-            for arg in args:
-                eval_result, sub_expr = recursive_evaluate(arg)
-                evaluated_args.append(eval_result)
-                substituted_args.append(sub_expr)
-
-            result = evaluate_operation(operation, evaluated_args)
-
-            # Формируем строку подстановки для итогового вывода
-            substituted_expression = f"{operation}(" + ", ".join(substituted_args) + f") = {result}"
-            return result, substituted_expression
-        else:
-            raise ValueError(f"Неправильное выражение: {expr}")
-
-    # Выполняем подстановку для выражения
-    _, full_expression = recursive_evaluate(expression)
-    return full_expression
-
-# Пример использования
-def process_graph(graph, operations, out_file, i, in_file):
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.batch_runner import log_error, run_files
+from nnlib.column_io import CHUNK_SIZE
+from nnlib.evaluator import EvaluationSession, compile_graph, evaluate_batch_file
+from nnlib.graph_cache import read_checked_graph
+from nnlib.graph_store import SUMMARY_LIMIT
+from nnlib.operators import load_operator_plugins
+from nnlib.prefix import build_prefix_function
+from nnlib.toposort import format_cycle, topological_order
+from nnlib.xml_io import load_graph_file
+
+
+# Стоки графа: вершины без исходящих дуг, в порядке сортировки имён
+def find_stok(graph):
+    return graph.sinks()
+
+# Вычисление функции для каждого стока по скомпилированной программе.
+# Запись подстановки значений строится только при trace=True.
+# results - уже вычисленные значения и ошибки вершин (например, из сессии)
+def process_graph(graph, roots, program, out_file, i, in_file, trace=False, results=None):
+    values, errors = results if results is not None else program.evaluate()
     with open(out_file[:out_file.index(".")] + f"_{i}.txt", "w", encoding="UTF-8") as f:
-        for expr in graph:
-            try:
-                result = substitute_values(expr, operations)
+        for root in roots:
+            expr = build_prefix_function(graph, root) if trace else graph.names[root]
+            error = errors[root]
+            if error is None:
+                result = program.trace(values, root) if trace else values[root]
                 str_ = f"Результат для {expr}: {result}"
                 f.write(str_ + "\n")
                 print(str_)
-            except Exception as e:
-                message = f"Ошибка при обработке файла {in_file}: {e}"
+            else:
+                message = f"Ошибка при обработке файла {in_file}: {error}"
                 print(message)
-                with open("errors.txt", "a", encoding="UTF-8") as f:
-                    f.write(message + '\n')
-                print(f"Ошибка при вычислении для {expr}: {e}")
+                log_error(message)
+                print(f"Ошибка при вычислении для {expr}: {error}")
+
+# Пакетное вычисление стоков для всех строк файла значений листьев (CSV/NPY/NPZ).
+# Результат - CSV файл со столбцом на каждый сток
+def process_batch(graph, roots, program, batch_file, out_file, i, in_file, chunk_size=CHUNK_SIZE):
+    output_file = out_file[:out_file.index(".")] + f"_{i}.csv"
+    rows, errors = evaluate_batch_file(program, roots, batch_file, output_file, chunk_size)
+    for root in roots:
+        if errors[root] is not None:
+            message = f"Ошибка при обработке файла {in_file}: {errors[root]}"
+            print(message)
+            log_error(message)
+            print(f"Ошибка при вычислении для {graph.names[root]}: {errors[root]}")
+    print(f"Вычислено строк: {rows}, результаты сохранены в '{output_file}'")
 
 def load_operations(file_path):
     operations = {}
@@ -249,58 +76,101 @@ def load_operations(file_path):
                     
     return operations
 
-def main(input_file, output_file, operation_file):
-    data = read_file(input_file).strip().replace('(', '').replace(')', '').split(",")
-    vertices, edges = read_graph(data)
-    if has_cycle(edges, vertices):
-        raise Exception("Обнаружен цикл в графе")
-    graph = get_dict_graph(edges)
-    roots = find_stok(graph, vertices)
-    print("Стоки гарфа:", *roots)
-    prefix_funcs = generate_prefix_functions(graph, roots)
-    print(prefix_funcs)
+def main(input_file, output_file, operation_file, trace=False):
+    graph = load_graph_file(input_file)
+    order, cycle = topological_order(graph)
+    if cycle:
+        raise Exception(f"Обнаружен цикл в графе: {format_cycle(graph, cycle)}")
+    roots = find_stok(graph)
+    print("Стоки гарфа:", *(graph.names[v] for v in roots))
     operations = load_operations(operation_file)
     print(operations)
-    print(process_graph(prefix_funcs, operations, output_file))
+    program = compile_graph(graph, operations, order)
+    process_graph(graph, roots, program, output_file, 1, input_file, trace)
 
 
-def parse_file(in_file, i, out_file, operation_file):
+def parse_file(in_file, i, out_file, operation_file, trace=False, batch_file=None, chunk_size=CHUNK_SIZE,
+               cache=False, verbose=False):
 # Обрабатываем каждый файл
-    data = read_file(in_file).strip().replace('(', '').replace(')', '').split(",")
     try:
-        vertices, edges = read_graph(data)
-        print(f"Файл {i}: {in_file}")
-        print("Вершины:", vertices)
-        print("Граф:", edges)
-
-        if has_cycle(edges, vertices):
-            raise Exception("Обнаружен цикл в графе")
-        graph = get_dict_graph(edges)
-        roots = find_stok(graph, vertices)
-        print("Стоки гарфа:", *roots)
-        prefix_funcs = generate_prefix_functions(graph, roots)
+        graph, order, roots = read_checked_graph(in_file, i, cache, verbose)
+        print("Стоки гарфа:", *(graph.names[v] for v in roots))
         operations = load_operations(operation_file)
         print("Операции: ", operations)
-        print(process_graph(prefix_funcs, operations, out_file, i, in_file))
+        program = compile_graph(graph, operations, order)
+        if batch_file:
+            process_batch(graph, roots, program, batch_file, out_file, i, in_file, chunk_size)
+        else:
+            print(process_graph(graph, roots, program, out_file, i, in_file, trace))
+        return graph, roots, program
         
     except Exception as e:
         message = f"Ошибка при обработке файла {in_file}: {e}"
         print(message)
-        with open("errors.txt", "a", encoding="UTF-8") as f:
-            f.write(message + '\n')
+        log_error(message)
+
+# Отслеживание изменений файла операций: при изменении значений листьев
+# пересчитываются только зависящие от них вершины, выводятся изменившиеся стоки
+def watch_operations(sessions, out_file, operation_file, trace=False, interval=1.0):
+    mtime = os.stat(operation_file).st_mtime_ns
+    print(f"Ожидание изменений файла {operation_file} (Ctrl+C - выход)")
+    try:
+        while True:
+            time.sleep(interval)
+            current = os.stat(operation_file).st_mtime_ns
+            if current == mtime:
+                continue
+            mtime = current
+            operations = load_operations(operation_file)
+            for i, in_file, session in sessions:
+                graph = session.program.graph
+                changed = session.reload(operations)
+                print(f"Файл {i}: {in_file}, изменились стоки:", *(graph.names[v] for v in changed))
+                if changed:
+                    process_graph(graph, session.roots, session.program, out_file, i, in_file, trace,
+                                  (session.values, session.errors))
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Программа для обработки множества графов.")
-    parser.add_argument('-i', nargs='+', help='Входные файлы для обработки')
+    parser.add_argument('-i', nargs='+', help='Входные файлы для обработки (текст или XML файлы nntask1)')
     parser.add_argument('-o', default="output.txt", help='Имя выходного файла (по умолчанию: output.txt)')
     parser.add_argument('-op', default="op.txt", help='Имя файла операций (по умолчанию: op.txt)')
+    parser.add_argument('--trace', action='store_true', help='Записывать префиксную запись и подстановку значений')
+    parser.add_argument('--batch', help='Файл значений листьев (CSV с заголовком, NPY или NPZ) для пакетного вычисления')
+    parser.add_argument('--chunk_size', type=int, default=CHUNK_SIZE, help=f'Число строк пакета, обрабатываемых за раз (по умолчанию: {CHUNK_SIZE})')
+    parser.add_argument('--operators', help='Файл Python с пользовательскими операциями (вызовы register_operator)')
+    parser.add_argument('--cache', action='store_true', help='Хранить проверенные графы в двоичном кэше рядом с входными файлами')
+    parser.add_argument('--watch', action='store_true', help='Отслеживать изменения файла операций и пересчитывать изменившиеся стоки')
+    parser.add_argument('--jobs', type=int, default=1, help='Число процессов для параллельной обработки файлов, кроме режима --watch (по умолчанию: 1)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Период проверки файла операций в секундах (по умолчанию: 1.0)')
+    parser.add_argument('--verbose', action='store_true', help=f'Выводить все вершины и дуги графа, а не только первые {SUMMARY_LIMIT}')
 
     args = parser.parse_args()
+    if args.operators:
+        load_operator_plugins(args.operators)
     out_file = args.o
     operation_file = args.op
-    for i, data in enumerate(args.i):
-        parse_file(data, i + 1, out_file, operation_file)
+    tasks = [(data, i + 1, out_file, operation_file, args.trace, args.batch, args.chunk_size, args.cache, args.verbose)
+             for i, data in enumerate(args.i)]
+    if not args.watch:
+        # Пользовательские операции регистрируются и в процессах пула
+        if args.operators:
+            run_files(parse_file, tasks, args.jobs, load_operator_plugins, (args.operators,))
+        else:
+            run_files(parse_file, tasks, args.jobs)
+    else:
+        # Сессии вычислений остаются в этом процессе, поэтому файлы обрабатываются по очереди
+        sessions = []
+        for task in tasks:
+            parsed = parse_file(*task)
+            if parsed is not None:
+                graph, roots, program = parsed
+                sessions.append((task[1], task[0], EvaluationSession(program, roots)))
+        if sessions:
+            watch_operations(sessions, out_file, operation_file, args.trace, args.interval)
 
 
     # input_file = "input.txt"
@@ -0,0 +1,56 @@
+# Сервер вычислений: сети загружаются один раз и остаются в памяти,
+# векторы принимаются через stdin/stdout или Unix-сокет.
+# Пример: python nn_server.py -i xor=input.txt input2.txt [--socket /tmp/nn.sock]
+# Запрос: "xor: 0.1, 0.5, 0.9; 0.2, 0.3, 0.4", ответ: "ok: 0.58...; 0.58..."
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.inference_server import MAX_BATCH, MAX_DELAY, InferenceServer
+from nntask4 import load_network
+
+
+# Сети по аргументам "имя=файл" или "файл" (имя - файл без расширения)
+def load_networks(specs):
+    networks = {}
+    for spec in specs:
+        name, _, file_path = spec.rpartition("=")
+        if not name:
+            name = os.path.splitext(os.path.basename(file_path))[0]
+        networks[name], _ = load_network(file_path)
+    return networks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сервер вычислений для нескольких нейронных сетей.")
+    parser.add_argument(
+        '-i', '--nn_files', nargs='+', required=True,
+        help="Сети в виде имя=файл или файл (имя - файл без расширения), JSON или двоичный формат"
+    )
+    parser.add_argument(
+        '--socket',
+        help="Путь Unix-сокета (по умолчанию запросы читаются из stdin, ответы пишутся в stdout)"
+    )
+    parser.add_argument(
+        '--max_batch', type=int, default=MAX_BATCH,
+        help=f"Наибольшее число векторов в пакете (по умолчанию: {MAX_BATCH})"
+    )
+    parser.add_argument(
+        '--max_delay', type=float, default=MAX_DELAY,
+        help=f"Время ожидания попутных запросов для пакета, с (по умолчанию: {MAX_DELAY})"
+    )
+
+    args = parser.parse_args()
+    server = InferenceServer(load_networks(args.nn_files), args.max_batch, args.max_delay)
+    print("Загружены сети:", *server.batchers, file=sys.stderr)
+    try:
+        if args.socket:
+            server.serve_unix(args.socket)
+        else:
+            server.serve_lines(sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -1,7 +1,15 @@
 import argparse
 import json
-import math
 import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.column_io import CHUNK_SIZE
+from nnlib.network import Network, forward_file
+from nnlib.network_io import is_binary_network, read_network_binary, write_network_binary
 
 # Чтение вектора из файла
 def read_vector(file_path):
@@ -11,6 +19,13 @@ def read_vector(file_path):
     except Exception as e:
         raise ValueError(f"Ошибка чтения входного вектора: {e}")
 
+# Чтение всех входных векторов файла (по одному в строке) в матрицу N x d
+def read_vectors(file_path):
+    try:
+        return np.loadtxt(file_path, delimiter=',', ndmin=2)
+    except Exception as e:
+        raise ValueError(f"Ошибка чтения входных векторов: {e}")
+
 # Чтение состояния нейронной сети (весов) из файла
 def read_nn_state(file_path):
     try:
@@ -22,22 +37,29 @@ def read_nn_state(file_path):
     except Exception as e:
         raise ValueError(f"Ошибка чтения состояния сети: {e}")
 
-# Сигмоидная функция активации
-def sigmoid(z, c):
-    return 1.0 / (1.0 + math.exp(-c * z))
+# Загрузка сети: двоичный формат (матрицы отображаются в память без копирования)
+# или JSON-массив весов слоя на строку. Возвращает сеть и веса из JSON (None для двоичного)
+def load_network(file_path):
+    try:
+        binary = is_binary_network(file_path)
+    except Exception as e:
+        raise ValueError(f"Ошибка чтения состояния сети: {e}")
+    if not binary:
+        weights = read_nn_state(file_path)
+        return Network(weights), weights
+    try:
+        matrices, c, activation = read_network_binary(file_path)
+    except Exception as e:
+        raise ValueError(f"Ошибка чтения состояния сети: {e}")
+    if activation != "sigmoid":
+        raise ValueError(f"Неподдерживаемая функция активации: {activation}")
+    dtype = matrices[0].dtype if matrices else np.float64
+    # Матрицы в файле уже транспонированы, как в Network
+    return Network([matrix.T for matrix in matrices], c, dtype), None
 
-# Прямое распространение
+# Прямое распространение одного вектора
 def forward_pass(weights, input_vector, c=1):
-    activations = input_vector
-    for layer in weights:
-        if len(activations) != len(layer[0]):
-            raise ValueError("Длина входного вектора не совпадает с матрицей весов")
-        next_activations = []
-        for neuron_weights in layer:
-            z = sum(w * a for w, a in zip(neuron_weights, activations))
-            next_activations.append(sigmoid(z, c))
-        activations = next_activations
-    return activations
+    return Network(weights, c).forward(input_vector).tolist()
 
 # Запись выходного вектора в файл
 def write_output(output_vector, file_path):
@@ -47,6 +69,22 @@ def write_output(output_vector, file_path):
     except Exception as e:
         raise ValueError(f"Ошибка записи выходного вектора: {e}")
 
+# Запись выходных векторов в файл, по одному в строке
+def write_outputs(output_vectors, file_path):
+    try:
+        with open(file_path, 'w') as file:
+            for row in output_vectors.tolist():
+                file.write(', '.join(map(str, row)) + '\n')
+    except Exception as e:
+        raise ValueError(f"Ошибка записи выходных векторов: {e}")
+
+# Потоковая обработка файла векторов порциями по chunk_size строк
+def stream_outputs(network, input_path, output_path, chunk_size=CHUNK_SIZE):
+    try:
+        return forward_file(network, input_path, output_path, chunk_size)
+    except Exception as e:
+        raise ValueError(f"Ошибка потоковой обработки векторов: {e}")
+
 # Сериализация состояния сети
 def serialize_nn(weights, file_path):
     try:
@@ -55,6 +93,18 @@ def serialize_nn(weights, file_path):
     except Exception as e:
         raise ValueError(f"Ошибка сериализации сети: {e}")
 
+# Сохранение сети: JSON для файлов .json, иначе двоичный формат
+def save_network(network, weights, file_path):
+    if file_path.endswith(".json"):
+        if weights is None:
+            weights = [matrix.T.tolist() for matrix in network.weights]
+        serialize_nn(weights, file_path)
+        return
+    try:
+        write_network_binary(file_path, network.weights, network.c, dtype=network.dtype)
+    except Exception as e:
+        raise ValueError(f"Ошибка сериализации сети: {e}")
+
 
 def main(args):
     error_log = "errors.txt"
@@ -63,20 +113,22 @@ def main(args):
 
     for idx, nn_file in enumerate(args.nn_files, start=1):
         try:
-            weights = read_nn_state(nn_file)
-            input_vector = read_vector(args.input_vector)
-            
-            output_vector = forward_pass(weights, input_vector)
-            
+            network, weights = load_network(nn_file)
             if len(args.nn_files) > 1:
                 output_file = f"output_{idx}.txt"
-                output_network_file = f"outputNetwork_{idx}.json"
+                output_network_file = f"outputNetwork_{idx}{os.path.splitext(args.output_network)[1]}"
             else:
                 output_file = args.output_file
                 output_network_file = args.output_network
             
-            write_output(output_vector, output_file)
-            serialize_nn(weights, output_network_file)
+            if args.stream:
+                rows = stream_outputs(network, args.input_vector, output_file, args.chunk_size)
+                print(f"Обработано векторов: {rows}")
+            elif args.batch:
+                write_outputs(network.forward(read_vectors(args.input_vector)), output_file)
+            else:
+                write_output(network.forward(read_vector(args.input_vector)).tolist(), output_file)
+            save_network(network, weights, output_network_file)
             
             print(f"Результат успешно сохранён для {nn_file}:")
             print(f"  Выходной вектор: {output_file}")
@@ -90,7 +142,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Программа для прямого распространения в нейронной сети.")
     parser.add_argument(
         '-i', '--nn_files', nargs='+', default=['input.txt'], 
-        help="Список файлов с весами нейронной сети (по умолчанию: input.txt)"
+        help="Список файлов с весами нейронной сети, JSON или двоичный формат (по умолчанию: input.txt)"
     )
     parser.add_argument(
         '--input_vector', default='input_vector.txt', 
@@ -102,7 +154,19 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         '--output_network', default='outputNetwork.json', 
-        help="Файл для сериализации состояния сети (по умолчанию: outputNetwork.json)"
+        help="Файл для сериализации состояния сети: .json - JSON, иначе двоичный формат (по умолчанию: outputNetwork.json)"
+    )
+    parser.add_argument(
+        '--batch', action='store_true',
+        help="Вычислить выход для всех векторов входного файла (по одному в строке)"
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help="Потоковая обработка векторов входного файла порциями, без загрузки файла целиком"
+    )
+    parser.add_argument(
+        '--chunk_size', type=int, default=CHUNK_SIZE,
+        help=f"Число векторов в порции потоковой обработки (по умолчанию: {CHUNK_SIZE})"
     )
 
     args = parser.parse_args()
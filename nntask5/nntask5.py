@@ -1,86 +1,190 @@
+import argparse
+import json
+import os
+import sys
+import time
+
 import numpy as np
 
-# Функция активации (сигмоида) и её производная
-def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
-def sigmoid_derivative(x):
-    return x * (1 - x)
+from nnlib.backprop import BackpropWorkspace
+from nnlib.checkpoint import load_checkpoint, save_checkpoint
+from nnlib.dataset import SHUFFLE_BUFFER, TrainingStream
+from nnlib.early_stopping import EarlyStopping
+from nnlib.metrics import MetricsLogger, truncate_metrics
+from nnlib.network_io import is_binary_network, read_network_binary, write_network_binary
+from nnlib.optimizers import OPTIMIZERS, SGD, make_optimizer
+from nnlib.training_io import load_layers, load_samples
 
-# Загрузка нейронной сети из файла
+# Загрузка нейронной сети из файла: двоичный формат, NPZ или список весов слоя на строку.
+# Двоичные матрицы отображаются в память с копированием при записи
 def load_network(file_path):
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-        layers = [eval(line.strip()) for line in lines]
-    return [np.array(layer) for layer in layers]
-
-# Загрузка обучающей выборки
-def load_training_data(file_path):
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-        data = []
-        for line in lines:
-            x, y = line.strip().split("->")
-            x = eval(x.strip())
-            y = eval(y.strip())
-            data.append((np.array(x), np.array(y)))
-    return data
-
-# Метод обратного распространения ошибки
-def train_network(network, training_data, iterations, output_file="training_history.txt"):
-    history = []
-    
-    for iteration in range(1, iterations + 1):
-        total_error = 0
-        for x, y in training_data:
-            
-            # Прямое распространение
-            activations = [x]
+    if is_binary_network(file_path):
+        return read_network_binary(file_path, mode="c")[0]
+    return load_layers(file_path)
+
+# Сохранение сети: для .txt и .json - JSON-массив весов слоя на строку, иначе двоичный формат
+def save_network(network, file_path):
+    if file_path.endswith((".txt", ".json")):
+        with open(file_path, "w") as file:
             for layer in network:
-                activations.append(sigmoid(np.dot(activations[-1], layer)))
-
-            # Ошибка выходного слоя
-            error = y - activations[-1]
-            total_error += np.sum(error ** 2)
-            # print(error, total_error)
-
-            # Обратное распространение
-            deltas = [error * sigmoid_derivative(activations[-1])]
-            for i in range(len(network) - 1, 0, -1):
-                delta = deltas[-1].dot(network[i].T) * sigmoid_derivative(activations[i])
-                deltas.append(delta)
-            deltas.reverse()
-
-            # Обновление весов
-            for i in range(len(network)):
-                network[i] += activations[i][:, np.newaxis] @ deltas[i][np.newaxis, :]
-
-        # Сохранение ошибки для текущей итерации
-        history.append(f"{iteration} : {total_error}")
-
-    # Запись истории обучения в файл
-    with open(output_file, "w") as file:
-        file.write("\n".join(history))
+                file.write(json.dumps(np.asarray(layer).tolist()) + "\n")
+    else:
+        write_network_binary(file_path, network)
+
+# Загрузка обучающей выборки: матрицы входов и целевых выходов.
+# Текст "[x...] -> [y...]", CSV, NPZ или NPY (mmap=True - отображение в память)
+def load_training_data(file_path, mmap=False):
+    return load_samples(file_path, mmap)
+
+# Входы и целевые выходы выборки в виде матриц (образец - строка).
+# training_data - пара матриц или список пар векторов (x, y)
+def stack_training_data(training_data):
+    if isinstance(training_data, tuple):
+        return training_data
+    inputs = np.array([x for x, _ in training_data], dtype=float)
+    targets = np.array([y for _, y in training_data], dtype=float)
+    return inputs, targets
+
+# Мини-пакеты одной эпохи: из потоковой выборки TrainingStream (перемешанные,
+# с фоновой подготовкой) или по порядку из матриц выборки
+def iter_batches(training_data, batch_size):
+    if isinstance(training_data, TrainingStream):
+        return training_data.batches(batch_size)
+    inputs, targets = stack_training_data(training_data)
+    return ((inputs[start:start + batch_size], targets[start:start + batch_size])
+            for start in range(0, len(inputs), batch_size))
+
+# Метод обратного распространения ошибки по мини-пакетам из batch_size образцов.
+# Пакет проходит каждый слой за одно матричное умножение, градиенты образцов
+# пакета суммируются, и веса обновляются один раз на пакет.
+# При batch_size=1 - обновление после каждого образца, как в исходном методе.
+# Буферы активаций, дельт и градиентов выделяются один раз на всё обучение.
+# optimizer - метод из nnlib.optimizers, по умолчанию SGD с шагом 1.
+# stopping - критерии досрочной остановки EarlyStopping. При заданном
+# checkpoint_file каждые checkpoint_every эпох и в конце обучения сохраняется
+# контрольная точка. start_iteration и elapsed - число эпох и время обучения
+# до возобновления. История (ошибка, время, нормы градиентов слоёв на последнем
+# пакете) пишется в output_file через буфер фоновым потоком, каждые log_interval эпох.
+# Возвращает причину досрочной остановки или None
+def train_network(network, training_data, iterations, output_file="training_history.txt", batch_size=1,
+                  optimizer=None, stopping=None, checkpoint_file=None, checkpoint_every=1,
+                  start_iteration=0, elapsed=0.0, log_interval=1):
+    if optimizer is None:
+        optimizer = SGD(1.0)
+    reason = None
+    # Список пар превращается в матрицы один раз, а не на каждой эпохе
+    if not isinstance(training_data, TrainingStream):
+        training_data = stack_training_data(training_data)
+    workspace = BackpropWorkspace(network, batch_size)
+
+    # При возобновлении история продолжается с контрольной точки
+    if start_iteration:
+        truncate_metrics(output_file, start_iteration)
+    columns = ["iteration", "error", "time"] + [f"grad_norm_{i}" for i in range(len(network))]
+    start = time.perf_counter() - elapsed
+
+    with MetricsLogger(output_file, columns, "{iteration} : {error}", append=bool(start_iteration)) as logger:
+        for iteration in range(start_iteration + 1, iterations + 1):
+            total_error = 0
+            for x, y in iter_batches(training_data, batch_size):
+                total_error += workspace.compute_gradients(network, x, y)
+
+                # Обновление весов по сумме градиентов пакета
+                optimizer.step(network, workspace.gradients)
+
+            if stopping is not None:
+                reason = stopping.update(total_error)
+
+            # Сохранение ошибки для текущей итерации
+            last = reason or iteration == iterations
+            if iteration % log_interval == 0 or last:
+                logger.log(iteration, total_error, time.perf_counter() - start,
+                           *(np.linalg.norm(gradient) for gradient in workspace.gradients))
+            if checkpoint_file and (iteration % checkpoint_every == 0 or last):
+                # История в файле не должна отставать от контрольной точки
+                logger.flush()
+                save_checkpoint(checkpoint_file, network, optimizer, iteration, time.perf_counter() - start,
+                                stopping.state() if stopping is not None else None)
+            if reason:
+                break
+    return reason
 
 # Основная программа
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 4:
-        print("Использование: python nntask5.py <network_file> <training_file> <iterations>")
-        sys.exit(1)
-
-    network_file = sys.argv[1]
-    training_file = sys.argv[2]
-    iterations = int(sys.argv[3])
+    parser = argparse.ArgumentParser(description="Обучение нейронной сети методом обратного распространения ошибки.")
+    parser.add_argument('network_file', help='Файл сети: список весов слоя на строку или двоичный формат')
+    parser.add_argument('training_file', help='Файл обучающей выборки: строки вида [x...] -> [y...], CSV, NPZ или NPY '
+                        '(NPZ без --stream загружается в память целиком)')
+    parser.add_argument('iterations', type=int, help='Число итераций (эпох) обучения')
+    parser.add_argument('output_network_file', nargs='?', help='Файл для сохранения обученной сети (.txt/.json или двоичный)')
+    parser.add_argument('--mmap', action='store_true', help='Отображать выборку NPY в память, а не загружать целиком')
+    parser.add_argument('--stream', action='store_true', help='Читать выборку порциями во время обучения (данные больше памяти), с перемешиванием')
+    parser.add_argument('--shuffle_buffer', type=int, default=SHUFFLE_BUFFER, help=f'Размер буфера перемешивания в строках (по умолчанию: {SHUFFLE_BUFFER})')
+    parser.add_argument('--seed', type=int, help='Начальное состояние генератора перемешивания')
+    parser.add_argument('--batch_size', type=int, default=1, help='Число образцов в мини-пакете (по умолчанию: 1)')
+    parser.add_argument('--optimizer', choices=list(OPTIMIZERS), default="SGD", help='Метод обучения (по умолчанию: SGD)')
+    parser.add_argument('--learning_rate', type=float, default=1.0, help='Скорость обучения (по умолчанию: 1.0)')
+    parser.add_argument('--target_error', type=float, help='Остановить обучение, когда ошибка эпохи не больше заданной')
+    parser.add_argument('--patience', type=int, help='Остановить обучение после стольких эпох без улучшения ошибки')
+    parser.add_argument('--min_delta', type=float, default=0.0, help='Наименьшее уменьшение ошибки, считающееся улучшением (по умолчанию: 0)')
+    parser.add_argument('--time_budget', type=float, help='Ограничение времени обучения в секундах')
+    parser.add_argument('--checkpoint', help='Файл контрольной точки (веса и состояние метода обучения)')
+    parser.add_argument('--checkpoint_every', type=int, default=1, help='Сохранять контрольную точку каждые N эпох (по умолчанию: 1)')
+    parser.add_argument('--resume', action='store_true', help='Продолжить обучение с контрольной точки --checkpoint')
+    parser.add_argument('--history_file', default="training_history.txt",
+                        help='Файл истории обучения: .csv, .bin (двоичный по столбцам) или текст (по умолчанию: training_history.txt)')
+    parser.add_argument('--log_interval', type=int, default=1, help='Записывать историю каждые N эпох (по умолчанию: 1)')
+
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume требует указать файл --checkpoint")
+    network_file = args.network_file
+    training_file = args.training_file
+    iterations = args.iterations
+    output_network_file = args.output_network_file
 
     network = load_network(network_file)
-    training_data = load_training_data(training_file)
+    if args.stream:
+        training_data = TrainingStream(training_file, args.shuffle_buffer, seed=args.seed)
+    else:
+        training_data = load_training_data(training_file, args.mmap)
 
     try:
 
         # Обучение нейронной сети
-        train_network(network, training_data, iterations)
-        print("Обучение завершено. История сохранена в 'training_history.txt'.")
+        optimizer = make_optimizer(args.optimizer, args.learning_rate)
+        stopping = None
+        if args.target_error is not None or args.patience is not None or args.time_budget is not None:
+            stopping = EarlyStopping(args.target_error, args.patience, args.min_delta, args.time_budget)
+        start_iteration = 0
+        elapsed = 0.0
+
+        # Возобновление: сеть, метод обучения с его состоянием и история берутся из контрольной точки
+        if args.resume:
+            if os.path.exists(args.checkpoint):
+                checkpoint = load_checkpoint(args.checkpoint)
+                network = checkpoint.network
+                optimizer = make_optimizer(checkpoint.method, checkpoint.learning_rate)
+                optimizer.restore_state(network, checkpoint.optimizer_state, checkpoint.counters)
+                start_iteration = checkpoint.iteration
+                elapsed = checkpoint.elapsed
+                if stopping is not None:
+                    stopping.restore(checkpoint.stopping_state)
+                print(f"Обучение продолжено с эпохи {checkpoint.iteration + 1}.")
+            else:
+                print(f"Контрольная точка '{args.checkpoint}' не найдена, обучение начато заново.")
+
+        reason = train_network(network, training_data, iterations, args.history_file, args.batch_size, optimizer,
+                               stopping, args.checkpoint, args.checkpoint_every, start_iteration, elapsed,
+                               args.log_interval)
+        if reason:
+            print(f"Обучение остановлено досрочно: {reason}.")
+        print(f"Обучение завершено. История сохранена в '{args.history_file}'.")
+        if output_network_file:
+            save_network(network, output_network_file)
+            print(f"Обученная сеть сохранена в '{output_network_file}'.")
     
     except Exception as err:
 
@@ -1,116 +1,137 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Функция активации (сигмоида) и её производная
-def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
-def sigmoid_derivative(x):
-    return x * (1 - x)
+from nnlib.backprop import BackpropWorkspace
+from nnlib.full_batch import FULL_BATCH_METHODS, make_full_batch_method
+from nnlib.metrics import MetricsLogger, read_metrics
+from nnlib.optimizers import make_optimizer
+from nnlib.shared_arrays import attach_arrays, share_arrays
+from nnlib.training_io import load_layers, load_samples
 
-# Загрузка нейронной сети из файла
+# Загрузка нейронной сети из файла (список весов слоя на строку или NPZ)
 def load_network(file_path):
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-        layers = [eval(line.strip()) for line in lines]
-    return [np.array(layer) for layer in layers]
+    return load_layers(file_path)
 
-# Загрузка обучающей выборки
+# Загрузка обучающей выборки: список пар (вход, целевой выход)
 def load_training_data(file_path):
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-        data = []
-        for line in lines:
-            x, y = line.strip().split("->")
-            x = eval(x.strip())
-            y = eval(y.strip())
-            data.append((np.array(x), np.array(y)))
-    return data
-
-# Метод обратного распространения ошибки с различными градиентными методами
-def train_network(network, training_data, iterations, learning_rate, method, output_file="training_history.txt"):
+    return list(zip(*load_samples(file_path)))
+
+# История обучения пишется фоновым потоком журнала метрик
+HISTORY_COLUMNS = ["iteration", "error"]
+HISTORY_FORMAT = "Iteration {iteration}: Error = {error}"
+
+# Полнопакетное обучение (сопряжённые градиенты с линейным поиском, L-BFGS):
+# итерация - один шаг по градиенту всей выборки, скорость обучения не используется
+def train_network_full_batch(network, training_data, iterations, method, output_file):
+    history = []
+    inputs = np.array([x for x, _ in training_data], dtype=float)
+    targets = np.array([y for _, y in training_data], dtype=float)
+    full_batch_method = make_full_batch_method(method, network, inputs, targets)
+
+    with MetricsLogger(output_file, HISTORY_COLUMNS, HISTORY_FORMAT) as logger:
+        for iteration in range(1, iterations + 1):
+            total_error = full_batch_method.step()
+            history.append(total_error)
+            logger.log(iteration, total_error)
+
+    return history
+
+# Метод обратного распространения ошибки с различными градиентными методами.
+# При заданном seed порядок примеров перемешивается на каждой итерации
+def train_network(network, training_data, iterations, learning_rate, method, output_file="training_history.txt",
+                  seed=None):
+    if method in FULL_BATCH_METHODS:
+        return train_network_full_batch(network, training_data, iterations, method, output_file)
     history = []
+    rng = np.random.default_rng(seed) if seed is not None else None
 
-    with open(output_file, "w") as file:
-        momentum = [np.zeros_like(layer) for layer in network]
-        rprop_grad_prev = [np.zeros_like(layer) for layer in network]
-        rprop_step = [np.full_like(layer, 0.1) for layer in network]
-        adagrad_cache = [np.zeros_like(layer) for layer in network]
-        adadelta_cache = [np.zeros_like(layer) for layer in network]
-        adadelta_momentum = [np.zeros_like(layer) for layer in network]
-        adam_m = [np.zeros_like(layer) for layer in network]
-        adam_v = [np.zeros_like(layer) for layer in network]
-        beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    with MetricsLogger(output_file, HISTORY_COLUMNS, HISTORY_FORMAT) as logger:
+        optimizer = make_optimizer(method, learning_rate)
+        workspace = BackpropWorkspace(network)
 
         for iteration in range(1, iterations + 1):
             total_error = 0
 
-            for x, y in training_data:
-                # Прямое распространение
-                activations = [x]
-                for layer in network:
-                    activations.append(sigmoid(np.dot(activations[-1], layer)))
-
-                # Ошибка выходного слоя
-                error = y - activations[-1]
-                total_error += np.sum(error ** 2)
-
-                # Обратное распространение
-                deltas = [error * sigmoid_derivative(activations[-1])]
-                for i in range(len(network) - 1, 0, -1):
-                    delta = deltas[-1].dot(network[i].T) * sigmoid_derivative(activations[i])
-                    deltas.append(delta)
-                deltas.reverse()
-
-                # Обновление весов
-                for i in range(len(network)):
-                    gradient = activations[i][:, np.newaxis] @ deltas[i][np.newaxis, :]
-
-                    if method == "SGD":
-                        network[i] += learning_rate * gradient
-                    elif method == "Momentum":
-                        momentum[i] = 0.9 * momentum[i] + learning_rate * gradient
-                        network[i] += momentum[i]
-                    elif method == "QuickProp":
-                        network[i] += gradient / (np.abs(gradient) + epsilon) * learning_rate
-                    elif method == "RProp":
-                        sign_change = np.sign(rprop_grad_prev[i] * gradient)
-                        rprop_step[i][sign_change > 0] *= 1.2
-                        rprop_step[i][sign_change < 0] *= 0.5
-                        rprop_grad_prev[i] = gradient
-                        network[i] += rprop_step[i] * np.sign(gradient)
-                    elif method == "ConjugateGradient":
-                        # Упрощённый placeholder, полноценный метод требует больше логики
-                        network[i] += learning_rate * gradient
-                    elif method == "NAG":
-                        lookahead = network[i] + 0.9 * momentum[i]
-                        momentum[i] = 0.9 * momentum[i] + learning_rate * gradient
-                        network[i] = lookahead + momentum[i]
-                    elif method == "AdaGrad":
-                        adagrad_cache[i] += gradient ** 2
-                        network[i] += learning_rate * gradient / (np.sqrt(adagrad_cache[i]) + epsilon)
-                    elif method == "AdaDelta":
-                        adadelta_cache[i] = 0.9 * adadelta_cache[i] + 0.1 * gradient ** 2
-                        update = gradient * np.sqrt(adadelta_momentum[i] + epsilon) / np.sqrt(adadelta_cache[i] + epsilon)
-                        adadelta_momentum[i] = 0.9 * adadelta_momentum[i] + 0.1 * update ** 2
-                        network[i] += update
-                    elif method == "Adam":
-                        adam_m[i] = beta1 * adam_m[i] + (1 - beta1) * gradient
-                        adam_v[i] = beta2 * adam_v[i] + (1 - beta2) * (gradient ** 2)
-                        m_hat = adam_m[i] / (1 - beta1 ** iteration)
-                        v_hat = adam_v[i] / (1 - beta2 ** iteration)
-                        network[i] += learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+            order = rng.permutation(len(training_data)) if rng is not None else range(len(training_data))
+            for k in order:
+                x, y = training_data[k]
+                # Прямое и обратное распространение в заранее выделенных буферах
+                total_error += workspace.compute_gradients(network, x[np.newaxis, :], y[np.newaxis, :])
+
+                # Обновление весов выбранным методом
+                optimizer.step(network, workspace.gradients)
 
             # Сохранение ошибки для текущей итерации
             history.append(total_error)
-            file.write(f"Iteration {iteration}: Error = {total_error}\n")
+            logger.log(iteration, total_error)
 
     return history
 
-# Построение графика
+# Одна конфигурация (метод, скорость обучения, seed) в процессе пула.
+# Начальная сеть и выборка берутся из общей памяти, у процесса своя копия весов
+def run_configuration(shared, layer_count, iterations, method, learning_rate, seed, output_file):
+    arrays = attach_arrays(shared, copy=range(layer_count))
+    network = arrays[:layer_count]
+    training_data = list(zip(arrays[layer_count], arrays[layer_count + 1]))
+    start = time.perf_counter()
+    history = train_network(network, training_data, iterations, learning_rate, method, output_file, seed)
+    return history, time.perf_counter() - start
+
+
+# Запуск всех конфигураций в пуле процессов. Возвращает список
+# (конфигурация, история, время) для успешных и (конфигурация, ошибка) для остальных
+def run_configurations(network, inputs, targets, iterations, configurations, jobs):
+    block, shared = share_arrays(list(network) + [inputs, targets])
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(run_configuration, shared, len(network), iterations, *configuration)
+                       for configuration in configurations]
+            for configuration, future in zip(configurations, futures):
+                try:
+                    results.append((configuration,) + future.result())
+                except Exception as err:
+                    results.append((configuration, err))
+    finally:
+        block.close()
+        block.unlink()
+    return results
+
+
+# Таблица результатов: по строке на конфигурацию
+def write_results_table(results, output_file):
+    lines = [f"{'Метод':<18} {'Скорость':>10} {'Seed':>6} {'Ошибка':>14} {'Минимум':>14} {'Время, с':>9}"]
+    for result in results:
+        (method, learning_rate, seed, _), outcome = result[0], result[1:]
+        seed = "-" if seed is None else seed
+        # Полнопакетные методы выбирают шаг линейным поиском
+        learning_rate = "-" if method in FULL_BATCH_METHODS else f"{learning_rate:g}"
+        if len(outcome) == 1:
+            lines.append(f"{method:<18} {learning_rate:>10} {seed:>6} ошибка: {outcome[0]}")
+        else:
+            history, seconds = outcome
+            lines.append(f"{method:<18} {learning_rate:>10} {seed:>6} {history[-1]:>14.6g} "
+                         f"{min(history):>14.6g} {seconds:>9.2f}")
+    with open(output_file, "w", encoding="UTF-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return lines
+
+
+# Построение графика. История - список ошибок или путь к файлу истории
+# (.bin читается отображением в память, без загрузки)
 def plot_training_history(histories, methods):
     plt.figure(figsize=(10, 6))
     for history, method in zip(histories, methods):
+        if isinstance(history, str):
+            history = read_metrics(history)["error"]
         plt.plot(history, label=method)
     plt.xlabel("Итерации")
     plt.ylabel("Ошибка")
@@ -118,42 +139,60 @@ def plot_training_history(histories, methods):
     plt.legend()
     plt.grid()
     plt.savefig("training_comparison.png")
-    plt.show()
+    # Без дисплея график только сохраняется в файл
+    if plt.get_backend().lower() != "agg":
+        plt.show()
 
 # Основная программа
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) < 5:
-        print("Использование: python nntask5.py <network_file> <training_file> <iterations> <learning_rate>")
-        sys.exit(1)
-
-    network_file = sys.argv[1]
-    training_file = sys.argv[2]
-    iterations = int(sys.argv[3])
-    learning_rate = float(sys.argv[4])
-
-    network = load_network(network_file)
-    training_data = load_training_data(training_file)
-
-    methods = [
+    parser = argparse.ArgumentParser(description="Сравнение градиентных методов обучения нейронной сети")
+    parser.add_argument("network_file", help="Файл с нейронной сетью")
+    parser.add_argument("training_file", help="Файл с обучающей выборкой")
+    parser.add_argument("iterations", type=int, help="Количество итераций обучения")
+    parser.add_argument("learning_rates", type=float, nargs="+", help="Скорости обучения")
+    parser.add_argument("--methods", nargs="+", default=[
         "SGD", "Momentum", "QuickProp", "RProp", "ConjugateGradient",
-        "NAG", "AdaGrad", "AdaDelta", "Adam"
-    ]
-    histories = []
+        "NAG", "AdaGrad", "AdaDelta", "Adam", "FletcherReeves", "PolakRibiere", "LBFGS"
+    ], help="Сравниваемые методы")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[None],
+                        help="Seed перемешивания примеров (по умолчанию порядок файла)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Число процессов")
+    parser.add_argument("--headless", action="store_true", help="Не показывать график, только сохранить в файл")
+    args = parser.parse_args()
+
+    if args.headless or (sys.platform.startswith("linux") and not os.environ.get("DISPLAY")):
+        plt.switch_backend("Agg")
+
+    network = load_network(args.network_file)
+    inputs, targets = load_samples(args.training_file)
+
+    # При одной скорости обучения и без seed имена файлов и подписи - как раньше
+    single = len(args.learning_rates) == 1 and args.seeds == [None]
+    configurations = []
+    for method in args.methods:
+        for learning_rate in args.learning_rates:
+            for seed in args.seeds:
+                name = method if single else f"{method}_lr{learning_rate:g}" + ("" if seed is None else f"_seed{seed}")
+                configurations.append((method, learning_rate, seed, f"training_history_{name}.txt"))
+
+    results = run_configurations(network, inputs, targets, args.iterations, configurations, args.jobs)
 
-    for method in methods:
-        # Копируем сеть для каждого метода
-        network_copy = [np.copy(layer) for layer in network]
-
-        try:
-            output_file = f"training_history_{method}.txt"
-            history = train_network(network_copy, training_data, iterations, learning_rate, method, output_file=output_file)
-            histories.append(history)
-        except Exception as err:
-            with open("error.txt", "w", encoding="UTF-8") as f:
-                f.write(f"Ошибка для метода {method}: {str(err)}\n")
+    histories = []
+    labels = []
+    errors = []
+    for result in results:
+        method, learning_rate, seed, output_file = result[0]
+        if len(result) == 2:
+            errors.append(f"Ошибка для метода {method} (скорость {learning_rate:g}, seed {seed}): {str(result[1])}\n")
             print(f"Ошибка для метода {method}! Подробности сохранены в 'error.txt'.")
+            continue
+        histories.append(result[1])
+        labels.append(output_file[len("training_history_"):-len(".txt")])
+    if errors:
+        with open("error.txt", "w", encoding="UTF-8") as f:
+            f.writelines(errors)
+
+    print("\n".join(write_results_table(results, "training_results.txt")))
 
-    # Построение графика
-    plot_training_history(histories, methods)
\ No newline at end of file
+    # Построение графика после завершения всех процессов
+    plot_training_history(histories, labels)
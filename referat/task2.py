@@ -1,73 +1,41 @@
+import os
+import sys
+
+import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.optimizers import make_optimizer
 
-def optimize(method, x_init, gradient_fn, target_fn, learning_rate=0.1, iterations=1000):
-    x = x_init  
-    history = []
 
+# Правила скалярной версии, отличающиеся от правил обучения сетей:
+# RProp уменьшает шаг при любом несохранении знака, AdaDelta добавляет eps
+# после корня, NAG вычисляет градиент в точке предпросмотра
+SCALAR_OPTIONS = {
+    "RProp": {"two_way": True},
+    "AdaDelta": {"epsilon_outside": True},
+    "NAG": {"lookahead": True},
+}
 
-    momentum = 0
-    grad_squared = 0
-    rprop_grad_prev = 0
-    rprop_step = 0.1
-    v = 0
-    m = 0
-    rho = 0.9
-    beta1, beta2 = 0.9, 0.999
-    epsilon = 1e-8
-
-    for t in range(1, iterations + 1):
-        grad = gradient_fn(x)
-        history.append(target_fn(x))
-
-        if method == "SGD":
-            x -= learning_rate * grad
-
-        elif method == "Momentum":
-            momentum = rho * momentum - learning_rate * grad
-            x += momentum
-
-        elif method == "QuickProp":
-            if grad != 0:
-                x -= grad / (abs(grad) + epsilon) * learning_rate
-
-        elif method == "RProp":
-            sign_change = (rprop_grad_prev * grad) > 0
-            if sign_change:
-                rprop_step *= 1.2
-            else:
-                rprop_step *= 0.5
-            rprop_grad_prev = grad
-            x -= rprop_step * (1 if grad > 0 else -1)
-
-        elif method == "ConjugateGradient":
-            x -= learning_rate * grad
-
-        elif method == "NAG":
-            lookahead = x + rho * momentum
-            momentum = rho * momentum - learning_rate * gradient_fn(lookahead)
-            x += momentum
-
-        elif method == "AdaGrad":
-            grad_squared += grad**2
-            adjusted_lr = learning_rate / ((grad_squared**0.5) + epsilon)
-            x -= adjusted_lr * grad
-
-        elif method == "AdaDelta":
-            grad_squared = rho * grad_squared + (1 - rho) * grad**2
-            delta_x = -(v**0.5 + epsilon) / ((grad_squared**0.5) + epsilon) * grad
-            v = rho * v + (1 - rho) * delta_x**2
-            x += delta_x
-
-        elif method == "Adam":
-            m = beta1 * m + (1 - beta1) * grad
-            v = beta2 * v + (1 - beta2) * grad**2
-            m_hat = m / (1 - beta1**t)
-            v_hat = v / (1 - beta2**t)
-            x -= learning_rate * m_hat / ((v_hat**0.5) + epsilon)
 
+# Минимизация скалярной функции теми же объектами методов, что и при обучении сетей.
+# Точка хранится в 0-мерном массиве, методу передаётся антиградиент
+def optimize(method, x_init, gradient_fn, target_fn, learning_rate=0.1, iterations=1000):
+    optimizer = make_optimizer(method, learning_rate, **SCALAR_OPTIONS.get(method, {}))
+    x = np.array(x_init, dtype=float)
+    point = np.empty_like(x)
+    direction = np.empty_like(x)
+    history = []
+
+    for _ in range(iterations):
+        history.append(target_fn(float(x)))
+        if getattr(optimizer, "lookahead", False):
+            optimizer.lookahead_point([x], [point])
         else:
-            raise ValueError(f"Unknown method: {method}")
+            np.copyto(point, x)
+        np.negative(gradient_fn(float(point)), out=direction)
+        optimizer.step([x], [direction])
 
     return history
 
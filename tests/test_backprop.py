@@ -0,0 +1,103 @@
+# BackpropWorkspace: совпадение шага с прежним обновлением по одному образцу
+# и отсутствие выделения памяти на шаге после прогрева (tracemalloc).
+# Запуск: python -m pytest tests
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nnlib.backprop import BackpropWorkspace
+
+SIZES = [8, 16, 4]
+STEPS = 200
+# Допустимый прирост пикового объёма памяти за шаг, байт (скаляр ошибки и
+# служебные объекты NumPy); прежний цикл выделял десятки килобайт
+STEP_ALLOCATION_LIMIT = 2048
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def sigmoid_derivative(x):
+    return x * (1 - x)
+
+
+# Шаг прежнего train_network nntask5 по одному образцу
+def reference_step(network, x, y):
+    activations = [x]
+    for layer in network:
+        activations.append(sigmoid(activations[-1] @ layer))
+    error = y - activations[-1]
+    total_error = np.sum(error ** 2)
+    deltas = [error * sigmoid_derivative(activations[-1])]
+    for i in range(len(network) - 1, 0, -1):
+        deltas.append((deltas[-1] @ network[i].T) * sigmoid_derivative(activations[i]))
+    deltas.reverse()
+    for i in range(len(network)):
+        network[i] += activations[i].T @ deltas[i]
+    return total_error
+
+
+def workspace_step(workspace, network, x, y):
+    total_error = workspace.compute_gradients(network, x, y)
+    for layer, gradient in zip(network, workspace.gradients):
+        layer += gradient
+    return total_error
+
+
+def make_problem(seed=0):
+    rng = np.random.default_rng(seed)
+    network = [rng.uniform(-0.5, 0.5, (SIZES[k], SIZES[k + 1])) for k in range(len(SIZES) - 1)]
+    samples = [(rng.random((1, SIZES[0])), rng.random((1, SIZES[-1]))) for _ in range(STEPS)]
+    return network, samples
+
+
+def test_workspace_step_matches_reference():
+    network, samples = make_problem()
+    expected = [layer.copy() for layer in network]
+    workspace = BackpropWorkspace(network)
+    for x, y in samples:
+        expected_error = reference_step(expected, x, y)
+        error = workspace_step(workspace, network, x, y)
+        assert np.isclose(error, expected_error, rtol=1e-12, atol=0)
+    for layer, expected_layer in zip(network, expected):
+        np.testing.assert_allclose(layer, expected_layer, rtol=1e-12, atol=1e-15)
+
+
+def test_workspace_step_does_not_allocate():
+    network, samples = make_problem(1)
+    workspace = BackpropWorkspace(network)
+    # Прогрев: представления буферов и внутренние кэши NumPy
+    for x, y in samples[:10]:
+        workspace_step(workspace, network, x, y)
+
+    tracemalloc.start()
+    try:
+        worst = 0
+        for x, y in samples:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            workspace_step(workspace, network, x, y)
+            worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    assert worst < STEP_ALLOCATION_LIMIT, f"шаг выделяет {worst} байт"
+
+
+def test_reference_step_exceeds_limit():
+    # Проверка самого замера: прежний шаг создаёт новые массивы
+    network, samples = make_problem(2)
+    x, y = samples[0]
+    reference_step(network, x, y)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        reference_step(network, x, y)
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    assert peak > STEP_ALLOCATION_LIMIT